@@ -1,3 +1,4 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -5,9 +6,93 @@ class Settings(BaseSettings):
     secret_key: str = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Authenticated principal cache (username -> user snapshot)
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: int = 60
+    # Password hashing: bcrypt cost and the dedicated pool it runs on
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
     groq_api_key: str = ""
     pexels_api_key: str = ""
+    # API endpoints; override to point at stand-ins (see loadtest/)
+    groq_base_url: str = "https://api.groq.com"
+    pexels_base_url: str = "https://api.pexels.com/v1"
     database_url: str = "sqlite:///./presentwallah.db"
+    # Connection pool, per engine and per process (size against the worker count)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # SQLite connection PRAGMAs
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    # Coalesce section autosaves for this many seconds before writing (0 writes through)
+    section_write_buffer_seconds: float = 2.0
+    # Revision history: a full snapshot every N revisions of a section, diffs in between
+    revision_snapshot_interval: int = 16
+    # Max number of sections generated in parallel for a single project
+    llm_max_concurrency: int = 6
+    # Groq plan limits (RPM/TPM) for the whole deployment; each process paces itself to
+    # an equal share of them, split across llm_processes
+    llm_requests_per_minute: int = 30
+    llm_tokens_per_minute: int = 12000
+    # Processes calling Groq (0: WEB_CONCURRENCY, which gunicorn.conf.py sets, else 1).
+    # Set it on every process when worker.py runs separately, counting the worker too.
+    llm_processes: int = 0
+    web_concurrency: int = 1
+    llm_max_in_flight: int = 16
+    llm_max_retries: int = 4
+    llm_backoff_base_seconds: float = 1.0
+    llm_backoff_max_seconds: float = 30.0
+    # Generate pptx decks with one structured call per llm_deck_max_slides slides
+    llm_deck_mode: bool = True
+    llm_deck_max_slides: int = 12
+    # Output budgets are sized from each prompt's requested format times this headroom
+    llm_budget_headroom: float = 1.5
+    # Background generation jobs (set JOB_WORKER_ENABLED=false to run worker.py separately)
+    job_worker_enabled: bool = True
+    job_poll_interval: float = 1.0
+    job_lease_seconds: int = 60
+    # LLM response cache (memory LRU + SQLite file; empty path disables the disk tier)
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_memory_entries: int = 1024
+    llm_cache_path: str = "./cache/llm_responses.sqlite3"
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    # Pexels image fetching (query -> URL and URL -> bytes cached on disk)
+    image_max_concurrency: int = 8
+    image_cache_path: str = "./cache/images.sqlite3"
+    image_cache_max_bytes: int = 256 * 1024 * 1024
+    image_cache_ttl_seconds: int = 30 * 24 * 3600
+    # Content-addressed image bytes shared by every export (empty disables; the SQLite cache then holds the bytes)
+    image_blob_dir: str = "./cache/blobs"
+    image_blob_max_bytes: int = 512 * 1024 * 1024
+    # Slide photos are cropped to their box and re-encoded at this resolution/quality
+    image_dpi: int = 150
+    image_jpeg_quality: int = 80
+    # Rendered export files, keyed by a digest of the project content (empty dir disables)
+    export_cache_dir: str = "./cache/exports"
+    export_cache_max_bytes: int = 512 * 1024 * 1024
+    # Document rendering process pool (0 renders inline in the request thread)
+    render_workers: int = 2
+    render_timeout_seconds: float = 120
+    # Bearer token for GET /metrics (empty disables the endpoint)
+    metrics_token: str = ""
+    
+    @property
+    def llm_process_count(self) -> int:
+        """How many processes split the Groq rate limits"""
+        return max(1, self.llm_processes or self.web_concurrency)
+    
+    @field_validator('llm_requests_per_minute', 'llm_tokens_per_minute')
+    @classmethod
+    def validate_rate_limit(cls, v):
+        # The scheduler's token buckets refill at this rate; 0 would never admit a call
+        if v <= 0:
+            raise ValueError('LLM rate limits must be greater than 0')
+        return v
     
     class Config:
         env_file = ".env"
@@ -1,18 +1,146 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import get_settings
+import threading
+import time
 
 settings = get_settings()
 
-# SQLite needs check_same_thread=False, PostgreSQL doesn't
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
+class PoolMetrics:
+    """Checkout counts and time spent waiting for a free connection, per pool"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+    
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+                "wait_seconds_max": round(self.wait_seconds_max, 4),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+            }
 
-engine = create_engine(
-    settings.database_url, connect_args=connect_args
-)
+class _MeteredPoolMixin:
+    metrics: PoolMetrics
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except Exception:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return entry
+    
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _is_sqlite(database_url: str) -> bool:
+    return database_url.startswith("sqlite")
+
+def _is_sqlite_memory(database_url: str) -> bool:
+    return _is_sqlite(database_url) and (database_url.rstrip("/").endswith(":") or ":memory:" in database_url)
+
+def _engine_options(database_url: str, pool_class) -> Dict[str, Any]:
+    options: Dict[str, Any] = {}
+    if _is_sqlite(database_url):
+        # SQLite needs check_same_thread=False, PostgreSQL doesn't
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_sqlite_memory(database_url):
+            # In-memory databases live in a single connection; keep SQLAlchemy's default pool
+            return options
+    options.update(
+        poolclass=pool_class,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside a writer; busy_timeout makes concurrent
+    # writers wait for the lock instead of failing with "database is locked"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.close()
+
+def _configure(engine: Engine, database_url: str):
+    if _is_sqlite(database_url):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    if isinstance(engine.pool, _MeteredPoolMixin):
+        engine.pool.metrics = PoolMetrics()
+
+def create_db_engine(database_url: str) -> Engine:
+    """Sync engine with pool sizing from Settings and SQLite PRAGMAs applied on connect"""
+    engine = create_engine(database_url, **_engine_options(database_url, MeteredQueuePool))
+    _configure(engine, database_url)
+    return engine
+
+def create_async_db_engine(database_url: str) -> AsyncEngine:
+    """Async counterpart of create_db_engine for an aiosqlite/asyncpg URL"""
+    engine = create_async_engine(database_url, **_engine_options(database_url, MeteredAsyncAdaptedQueuePool))
+    _configure(engine.sync_engine, database_url)
+    return engine
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    if isinstance(pool, _MeteredPoolMixin):
+        stats.update(pool.metrics.stats())
+    return stats
+
+engine = create_db_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync database URL onto the matching async driver (aiosqlite/asyncpg)"""
+    if database_url.startswith("sqlite:"):
+        return database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if database_url.startswith(prefix):
+            return "postgresql+asyncpg://" + database_url[len(prefix):]
+    return database_url
+
+# Async engine over the same database, used by handlers that await LLM calls
+async_engine = create_async_db_engine(get_async_database_url(settings.database_url))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -21,3 +149,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
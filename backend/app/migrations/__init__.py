@@ -0,0 +1,95 @@
+"""
+Versioned schema migrations.
+
+Each module in app/migrations/versions is named "<version>_<name>.py" and
+defines an upgrade(conn) function. Applied versions are recorded in the
+schema_migrations table, so `python migrate_db.py` only runs what is new.
+Migrations are written against SQLAlchemy Core so the same files run on
+SQLite and PostgreSQL, and they check the live schema before changing it so
+databases created by the old create_all-at-startup code can be adopted.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+import importlib
+import os
+import re
+
+_VERSION_MODULE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+# Arbitrary constant for pg_advisory_lock so concurrent deploys migrate one at a time
+_POSTGRES_LOCK_ID = 7_305_118
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+def load_migrations() -> List[Migration]:
+    directory = os.path.join(os.path.dirname(__file__), "versions")
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _VERSION_MODULE.match(filename)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.versions.{filename[:-3]}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module.upgrade))
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+def applied_versions(conn: Connection) -> List[int]:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return []
+    return list(conn.execute(select(schema_migrations.c.version).order_by(schema_migrations.c.version)).scalars())
+
+def current_version(engine: Engine) -> int:
+    with engine.begin() as conn:
+        versions = applied_versions(conn)
+    return versions[-1] if versions else 0
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    with engine.begin() as conn:
+        applied = set(applied_versions(conn))
+    return [migration for migration in load_migrations() if migration.version not in applied]
+
+def migrate(engine: Engine, target: Optional[int] = None, log: Callable[[str], None] = print) -> List[int]:
+    """Apply pending migrations in order (up to target, if given). Returns the versions applied."""
+    applied_now = []
+    with engine.connect() as lock_conn:
+        postgres = lock_conn.dialect.name == "postgresql"
+        if postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _POSTGRES_LOCK_ID})
+            lock_conn.commit()
+        try:
+            with engine.begin() as conn:
+                _metadata.create_all(conn, checkfirst=True)
+            for migration in pending_migrations(engine):
+                if target is not None and migration.version > target:
+                    break
+                log(f"Applying {migration.version:04d}_{migration.name}...")
+                # One transaction per migration: on failure nothing of it is recorded
+                with engine.begin() as conn:
+                    migration.upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(
+                        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                    ))
+                applied_now.append(migration.version)
+        finally:
+            if postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _POSTGRES_LOCK_ID})
+                lock_conn.commit()
+    return applied_now
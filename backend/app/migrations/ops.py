@@ -0,0 +1,28 @@
+"""Schema inspection helpers that keep migrations safe to run on partially migrated databases"""
+from sqlalchemy import Column, Index, inspect
+from sqlalchemy.engine import Connection
+
+def has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(existing["name"] == column for existing in inspect(conn).get_columns(table))
+
+def has_index(conn: Connection, table: str, name: str) -> bool:
+    return any(existing["name"] == name for existing in inspect(conn).get_indexes(table))
+
+def add_column(conn: Connection, table: str, column: Column):
+    """ALTER TABLE ... ADD COLUMN, skipped when the column already exists"""
+    if has_column(conn, table, column.name):
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    preparer = conn.dialect.identifier_preparer
+    ddl = f"ALTER TABLE {preparer.quote(table)} ADD COLUMN {preparer.quote(column.name)} {column_type}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    conn.exec_driver_sql(ddl)
+
+def create_index(conn: Connection, index: Index):
+    """CREATE INDEX for an Index bound to a Table, skipped when it already exists"""
+    if not has_index(conn, index.table.name, index.name):
+        index.create(conn)
@@ -0,0 +1,80 @@
+"""Tables as created by the original create_all-at-startup code (existing tables are left alone)"""
+from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, MetaData, String, Table, Text
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("username", String, unique=True, index=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "projects", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False),
+    Column("document_type", Enum("DOCX", "PPTX", name="documenttype"), nullable=False),
+    Column("main_topic", Text, nullable=False),
+    Column("template", String),
+    Column("font_size", Integer),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "sections", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("project_id", Integer, ForeignKey("projects.id"), nullable=False),
+    Column("title", String, nullable=False),
+    Column("content", Text),
+    Column("order", Integer, nullable=False),
+    Column("liked", Boolean, nullable=True),
+    Column("comment", Text),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "revisions", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("section_id", Integer, ForeignKey("sections.id"), nullable=False),
+    Column("prompt", Text, nullable=False),
+    Column("previous_content", Text, nullable=False),
+    Column("new_content", Text, nullable=False),
+    Column("created_at", DateTime),
+)
+
+job_status = Enum("QUEUED", "RUNNING", "COMPLETED", "FAILED", name="jobstatus")
+
+Table(
+    "generation_jobs", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("project_id", Integer, ForeignKey("projects.id"), nullable=False, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("status", job_status, nullable=False, index=True),
+    Column("total_sections", Integer, nullable=False),
+    Column("completed_sections", Integer, nullable=False),
+    Column("error", Text, nullable=True),
+    Column("locked_until", DateTime, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("finished_at", DateTime, nullable=True),
+)
+
+Table(
+    "generation_job_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("job_id", Integer, ForeignKey("generation_jobs.id"), nullable=False, index=True),
+    Column("section_id", Integer, ForeignKey("sections.id"), nullable=False),
+    Column("status", job_status, nullable=False),
+    Column("error", Text, nullable=True),
+    Column("updated_at", DateTime),
+)
+
+def upgrade(conn: Connection):
+    metadata.create_all(conn, checkfirst=True)
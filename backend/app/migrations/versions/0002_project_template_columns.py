@@ -0,0 +1,10 @@
+"""template/font_size on projects (formerly the standalone migrate_db.py)"""
+from sqlalchemy import Column, Integer, String, text
+from sqlalchemy.engine import Connection
+from app.migrations.ops import add_column
+
+def upgrade(conn: Connection):
+    add_column(conn, "projects", Column("template", String(50), server_default="'modern'"))
+    add_column(conn, "projects", Column("font_size", Integer, server_default="20"))
+    conn.execute(text("UPDATE projects SET template = 'modern' WHERE template IS NULL"))
+    conn.execute(text("UPDATE projects SET font_size = 20 WHERE font_size IS NULL"))
@@ -0,0 +1,19 @@
+"""
+Composite indexes for the dashboard and editor queries:
+- projects(user_id, updated_at): a user's projects, newest first
+- sections(project_id, order): a project's sections in order
+- revisions(section_id, created_at): a section's history in order
+"""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, Table
+from sqlalchemy.engine import Connection
+from app.migrations.ops import create_index
+
+metadata = MetaData()
+projects = Table("projects", metadata, Column("user_id", Integer), Column("updated_at", DateTime))
+sections = Table("sections", metadata, Column("project_id", Integer), Column("order", Integer))
+revisions = Table("revisions", metadata, Column("section_id", Integer), Column("created_at", DateTime))
+
+def upgrade(conn: Connection):
+    create_index(conn, Index("ix_projects_user_id_updated_at", projects.c.user_id, projects.c.updated_at))
+    create_index(conn, Index("ix_sections_project_id_order", sections.c.project_id, sections.c.order))
+    create_index(conn, Index("ix_revisions_section_id_created_at", revisions.c.section_id, revisions.c.created_at))
@@ -0,0 +1,116 @@
+"""
+Compressed revision storage (see app.services.revisions): adds the storage
+columns and rewrites existing plain-text revisions into snapshot/delta chains.
+
+The encoder is a copy of app.services.revisions as of this migration, so the
+data it writes doesn't change if the live one does.
+"""
+from difflib import SequenceMatcher
+from typing import Dict, Optional
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, MetaData, String, Table, Text, select, update
+from sqlalchemy.engine import Connection
+from app.migrations.ops import add_column
+import json
+import re
+import zlib
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+# Default REVISION_SNAPSHOT_INTERVAL; chains written here are valid under any setting
+SNAPSHOT_INTERVAL = 16
+
+_TOKEN = re.compile(r"\s+|\S+\s*")
+
+metadata = MetaData()
+revisions = Table(
+    "revisions", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("section_id", Integer),
+    Column("previous_content", Text),
+    Column("new_content", Text),
+    Column("storage", String(16)),
+    Column("base_revision_id", Integer),
+    Column("snapshot_revision_id", Integer),
+    Column("chain_depth", Integer),
+    Column("previous_data", LargeBinary),
+    Column("new_data", LargeBinary),
+    Column("created_at", DateTime),
+)
+
+def _compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"))
+
+def _make_delta(base: str, text: str) -> bytes:
+    base_tokens = _TOKEN.findall(base)
+    tokens = _TOKEN.findall(text)
+    offsets = [0]
+    for token in base_tokens:
+        offsets.append(offsets[-1] + len(token))
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, base_tokens, tokens).get_opcodes():
+        if tag == "equal":
+            ops.append([offsets[i1], offsets[i2]])
+        elif j1 < j2:
+            ops.append("".join(tokens[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"))
+
+def _encode_revision(
+    revision_id: int,
+    previous_content: str,
+    new_content: str,
+    base: Optional[Dict[str, object]],
+    base_content: Optional[str]
+) -> Dict[str, object]:
+    """Storage column values for a revision, given the section's previous revision (if any)"""
+    snapshot = _compress_text(new_content)
+    if base is not None and base["chain_depth"] + 1 < SNAPSHOT_INTERVAL:
+        delta = _make_delta(base_content, new_content)
+        if len(delta) < len(snapshot):
+            return {
+                "id": revision_id,
+                "storage": DELTA,
+                "base_revision_id": base["id"],
+                "snapshot_revision_id": base["id"] if base["storage"] == SNAPSHOT else base["snapshot_revision_id"],
+                "chain_depth": base["chain_depth"] + 1,
+                "new_data": delta,
+                "previous_data": _make_delta(base_content, previous_content),
+            }
+    return {
+        "id": revision_id,
+        "storage": SNAPSHOT,
+        "base_revision_id": None,
+        "snapshot_revision_id": None,
+        "chain_depth": 0,
+        "new_data": snapshot,
+        "previous_data": _make_delta(new_content, previous_content),
+    }
+
+def upgrade(conn: Connection):
+    add_column(conn, "revisions", Column("storage", String(16)))
+    add_column(conn, "revisions", Column("base_revision_id", Integer))
+    add_column(conn, "revisions", Column("snapshot_revision_id", Integer))
+    add_column(conn, "revisions", Column("chain_depth", Integer, server_default="0"))
+    add_column(conn, "revisions", Column("previous_data", LargeBinary))
+    add_column(conn, "revisions", Column("new_data", LargeBinary))
+    
+    section_ids = conn.execute(
+        select(revisions.c.section_id).where(revisions.c.storage.is_(None)).distinct()
+    ).scalars().all()
+    for section_id in section_ids:
+        base, base_content = None, None
+        rows = conn.execute(
+            select(revisions.c.id, revisions.c.previous_content, revisions.c.new_content)
+            .where(revisions.c.section_id == section_id)
+            .order_by(revisions.c.id)
+        ).all()
+        for row in rows:
+            revision = _encode_revision(row.id, row.previous_content or "", row.new_content or "", base, base_content)
+            values = {name: value for name, value in revision.items() if name != "id"}
+            conn.execute(
+                update(revisions).where(revisions.c.id == row.id).values(
+                    previous_content="",
+                    new_content="",
+                    **values
+                )
+            )
+            base, base_content = revision, row.new_content or ""
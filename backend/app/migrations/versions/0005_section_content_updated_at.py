@@ -0,0 +1,8 @@
+"""sections.content_updated_at: when the content (not likes or comments) last changed, for the autosave buffer"""
+from sqlalchemy import Column, DateTime, text
+from sqlalchemy.engine import Connection
+from app.migrations.ops import add_column
+
+def upgrade(conn: Connection):
+    add_column(conn, "sections", Column("content_updated_at", DateTime))
+    conn.execute(text("UPDATE sections SET content_updated_at = updated_at WHERE content_updated_at IS NULL"))
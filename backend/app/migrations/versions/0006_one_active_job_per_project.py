@@ -0,0 +1,26 @@
+"""
+Partial unique index on generation_jobs(project_id) over queued and running
+jobs, so two concurrent enqueues can't both create an active job for one
+project. Duplicates left by the old check-then-insert are failed first,
+keeping each project's oldest active job.
+"""
+from sqlalchemy import Column, Index, Integer, MetaData, Table, text
+from sqlalchemy.engine import Connection
+from app.migrations.ops import create_index
+
+ACTIVE = text("status IN ('QUEUED', 'RUNNING')")
+
+metadata = MetaData()
+generation_jobs = Table("generation_jobs", metadata, Column("project_id", Integer))
+
+def upgrade(conn: Connection):
+    conn.execute(text(
+        "UPDATE generation_jobs SET status = 'FAILED', locked_until = NULL, error = 'Superseded by an older active job' "
+        "WHERE status IN ('QUEUED', 'RUNNING') AND id > ("
+        "SELECT MIN(active.id) FROM generation_jobs AS active "
+        "WHERE active.project_id = generation_jobs.project_id AND active.status IN ('QUEUED', 'RUNNING'))"
+    ))
+    create_index(conn, Index(
+        "uq_generation_jobs_project_id_active", generation_jobs.c.project_id,
+        unique=True, sqlite_where=ACTIVE, postgresql_where=ACTIVE
+    ))
@@ -2,5 +2,9 @@ from app.models.user import User
 from app.models.project import Project, DocumentType
 from app.models.section import Section
 from app.models.revision import Revision
+from app.models.job import GenerationJob, GenerationJobItem, JobStatus
 
-__all__ = ["User", "Project", "DocumentType", "Section", "Revision"]
+__all__ = [
+    "User", "Project", "DocumentType", "Section", "Revision",
+    "GenerationJob", "GenerationJobItem", "JobStatus"
+]
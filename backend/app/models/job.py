@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime, Enum, Index, text
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+import enum
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        # At most one queued or running job per project (statuses are stored by name)
+        Index(
+            "uq_generation_jobs_project_id_active", "project_id", unique=True,
+            sqlite_where=text("status IN ('QUEUED', 'RUNNING')"),
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED, index=True)
+    total_sections = Column(Integer, nullable=False, default=0)
+    completed_sections = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    locked_until = Column(DateTime, nullable=True)  # Worker lease; expired leases are picked up again
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    
+    project = relationship("Project", back_populates="jobs")
+    items = relationship("GenerationJobItem", back_populates="job", cascade="all, delete-orphan")
+
+class GenerationJobItem(Base):
+    __tablename__ = "generation_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("generation_jobs.id"), nullable=False, index=True)
+    section_id = Column(Integer, ForeignKey("sections.id"), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    job = relationship("GenerationJob", back_populates="items")
+    section = relationship("Section")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -16,6 +16,9 @@ class SlideTemplate(enum.Enum):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_user_id_updated_at", "user_id", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -28,4 +31,5 @@ class Project(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     owner = relationship("User", back_populates="projects")
-    sections = relationship("Section", back_populates="project", cascade="all, delete-orphan")
+    sections = relationship("Section", back_populates="project", cascade="all, delete-orphan", order_by="Section.order")
+    jobs = relationship("GenerationJob", back_populates="project", cascade="all, delete-orphan")
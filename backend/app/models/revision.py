@@ -1,16 +1,31 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime, Index, String, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Revision(Base):
+    """
+    One refinement of a section. Text is stored compressed by app.services.revisions:
+    a "snapshot" row holds its new content in full, a "delta" row holds a diff
+    against its base revision's new content. Rows written before compaction
+    (storage NULL) still carry plain text in previous_content/new_content.
+    """
     __tablename__ = "revisions"
+    __table_args__ = (
+        Index("ix_revisions_section_id_created_at", "section_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     section_id = Column(Integer, ForeignKey("sections.id"), nullable=False)
     prompt = Column(Text, nullable=False)
-    previous_content = Column(Text, nullable=False)
-    new_content = Column(Text, nullable=False)
+    previous_content = Column(Text, nullable=False, default="")  # Legacy plain text, "" once compacted
+    new_content = Column(Text, nullable=False, default="")  # Legacy plain text, "" once compacted
+    storage = Column(String(16), nullable=True)  # "snapshot" | "delta" | NULL (legacy plain text)
+    base_revision_id = Column(Integer, nullable=True)  # Delta base; NULL for snapshots
+    snapshot_revision_id = Column(Integer, nullable=True)  # Snapshot the delta chain starts from
+    chain_depth = Column(Integer, default=0)  # Deltas since that snapshot
+    previous_data = Column(LargeBinary, nullable=True)
+    new_data = Column(LargeBinary, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     section = relationship("Section", back_populates="revisions")
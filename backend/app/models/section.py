@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import event, Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Section(Base):
     __tablename__ = "sections"
+    __table_args__ = (
+        Index("ix_sections_project_id_order", "project_id", "order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -15,6 +18,12 @@ class Section(Base):
     comment = Column(Text, default="")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Last content change only; buffered autosaves are written only if they are newer
+    content_updated_at = Column(DateTime, default=datetime.utcnow)
     
     project = relationship("Project", back_populates="sections")
     revisions = relationship("Revision", back_populates="section", cascade="all, delete-orphan")
+
+@event.listens_for(Section.content, "set")
+def _stamp_content_change(section, value, oldvalue, initiator):
+    section.content_updated_at = datetime.utcnow()
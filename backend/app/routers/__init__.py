@@ -1,3 +1,3 @@
-from app.routers import auth, projects
+from app.routers import auth, projects, jobs
 
-__all__ = ["auth", "projects"]
+__all__ = ["auth", "projects", "jobs"]
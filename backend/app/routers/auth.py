@@ -1,23 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from jose import JWTError, jwt
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.schemas import UserCreate, UserResponse, Token, TokenData
 from app.services.auth import (
-    authenticate_user, create_access_token, get_user_by_username,
-    get_user_by_email, create_user
+    authenticate_user_async, create_access_token, get_user_by_username,
+    get_principal, get_user_by_email, create_user, UserPrincipal, PasswordHasherBusy
 )
 from app.config import get_settings
-from app.models import User
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 settings = get_settings()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -32,7 +32,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
-    user = get_user_by_username(db, username=token_data.username)
+    # Served from the principal cache in steady state; the database is only hit on a miss
+    user = await get_principal(db, username=token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -69,6 +70,12 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         return new_user
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         print(f"Registration error: {str(e)}")
         raise HTTPException(
@@ -77,9 +84,16 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """Login and get access token"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await authenticate_user_async(db, form_data.username, form_data.password)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -94,6 +108,6 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: UserPrincipal = Depends(get_current_user)):
     """Get current user info"""
     return current_user
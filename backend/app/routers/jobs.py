@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.schemas import GenerateContentRequest, JobResponse
+from app.routers.auth import get_current_user
+from app.services.auth import UserPrincipal
+from app.services.jobs import enqueue_generation_job, get_job
+from app.services.projects import get_user_project_async
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+@router.post("/generate-content", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_generate_content(
+    request: GenerateContentRequest,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue AI content generation for all empty sections; poll GET /api/jobs/{id} for progress"""
+    project = await get_user_project_async(db, request.project_id, current_user.id)
+    
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    return await enqueue_generation_job(db, project)
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(
+    job_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get status and per-section progress of a generation job"""
+    job = await get_job(db, job_id, current_user.id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job
@@ -1,34 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from starlette.background import BackgroundTask
+from typing import AsyncIterator, List, Optional
+import asyncio
+import json
+import os
+import tempfile
 
-from app.database import get_db
-from app.models import User, Project, Section, Revision, DocumentType
+from app.database import get_db, get_async_db, AsyncSessionLocal
+from app.models import Project, Section, DocumentType, GenerationJob
 from app.schemas import (
-    ProjectCreate, ProjectResponse, ProjectListResponse, ProjectUpdate,
-    SectionResponse, SectionUpdate, GenerateContentRequest,
+    ProjectCreate, ProjectResponse, ProjectListPage, ProjectUpdate,
+    SectionResponse, SectionUpdate, SectionBatchUpdate, RevisionResponse, GenerateContentRequest,
     RefineContentRequest, AISuggestRequest
 )
 from app.routers.auth import get_current_user
-from app.services.llm import llm_service
-from app.services.document import document_service
+from app.services.auth import UserPrincipal
+from app.services.llm import async_llm_service, LLMGenerationError, LLMUnavailableError
+from app.services.projects import (
+    get_user_project, get_user_section, get_user_project_async, get_user_section_async,
+    list_user_projects
+)
+from app.services.revisions import add_revision_async, list_section_revisions_async
+from app.services.section_writes import section_write_buffer
+from app.services.render import render_executor, project_snapshot
+from app.services.export_cache import export_cache, export_digest, invalidate_project_exports
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
-@router.get("", response_model=List[ProjectListResponse])
+@router.get("", response_model=ProjectListPage)
 def list_projects(
-    current_user: User = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_section_counts: bool = False,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all projects for the current user"""
-    projects = db.query(Project).filter(Project.user_id == current_user.id).order_by(Project.updated_at.desc()).all()
-    return projects
+    """Get a page of the current user's projects, most recently updated first"""
+    try:
+        items, next_cursor = list_user_projects(
+            db, current_user.id, limit, cursor=cursor, with_section_counts=include_section_counts
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 def create_project(
     project_data: ProjectCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new project with sections/slides"""
@@ -55,20 +77,16 @@ def create_project(
         db.add(section)
     
     db.commit()
-    db.refresh(new_project)
-    return new_project
+    return get_user_project(db, new_project.id, current_user.id)
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 def get_project(
     project_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific project with all sections"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    project = get_user_project(db, project_id, current_user.id)
     
     if not project:
         raise HTTPException(
@@ -82,14 +100,11 @@ def get_project(
 def update_project_settings(
     project_id: int,
     settings: ProjectUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update project settings (template, font_size)"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    project = get_user_project(db, project_id, current_user.id, with_sections=False)
     
     if not project:
         raise HTTPException(
@@ -104,17 +119,21 @@ def update_project_settings(
         project.font_size = settings.font_size
     
     db.commit()
-    db.refresh(project)
-    return project
+    invalidate_project_exports(project.id)
+    return get_user_project(db, project.id, current_user.id)
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_project(
     project_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a project"""
-    project = db.query(Project).filter(
+    # Load the whole cascade up front so the ORM doesn't fetch revisions/job items per row
+    project = db.query(Project).options(
+        selectinload(Project.sections).selectinload(Section.revisions),
+        selectinload(Project.jobs).selectinload(GenerationJob.items)
+    ).filter(
         Project.id == project_id,
         Project.user_id == current_user.id
     ).first()
@@ -127,19 +146,17 @@ def delete_project(
     
     db.delete(project)
     db.commit()
+    invalidate_project_exports(project_id)
     return None
 
 @router.post("/generate-content", response_model=ProjectResponse)
-def generate_content(
+async def generate_content(
     request: GenerateContentRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate AI content for all sections in a project"""
-    project = db.query(Project).filter(
-        Project.id == request.project_id,
-        Project.user_id == current_user.id
-    ).first()
+    project = await get_user_project_async(db, request.project_id, current_user.id)
     
     if not project:
         raise HTTPException(
@@ -147,33 +164,37 @@ def generate_content(
             detail="Project not found"
         )
     
-    # Generate content for each section
+    # Generate content for all empty sections concurrently, committing each as it finishes
     doc_type = "docx" if project.document_type == DocumentType.DOCX else "pptx"
-    for section in project.sections:
-        if not section.content:  # Only generate if empty
-            content = llm_service.generate_content(
-                section_title=section.title,
-                main_topic=project.main_topic,
-                document_type=doc_type
-            )
-            section.content = content
+    pending = {section.id: section for section in project.sections if not section.content}
+    results = async_llm_service.generate_sections(
+        sections=[(section.id, section.title) for section in pending.values()],
+        main_topic=project.main_topic,
+        document_type=doc_type,
+        user_id=current_user.id
+    )
+    try:
+        async for section_id, content in results:
+            pending[section_id].content = content
+            await db.commit()
+    except LLMGenerationError as e:
+        # Generated sections are already saved; the failed ones stay empty and are retried next time
+        raise _llm_unavailable(e)
+    finally:
+        if pending:
+            invalidate_project_exports(project.id)
     
-    db.commit()
-    db.refresh(project)
-    return project
+    return await get_user_project_async(db, project.id, current_user.id)
 
 @router.put("/sections/{section_id}", response_model=SectionResponse)
 def update_section(
     section_id: int,
     section_update: SectionUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update section feedback (like/dislike, comment) or content"""
-    section = db.query(Section).join(Project).filter(
-        Section.id == section_id,
-        Project.user_id == current_user.id
-    ).first()
+    section = get_user_section(db, section_id, current_user.id, flush_pending=not section_write_buffer.enabled)
     
     if not section:
         raise HTTPException(
@@ -181,28 +202,103 @@ def update_section(
             detail="Section not found"
         )
     
+    pending = None
     if section_update.content is not None:
-        section.content = section_update.content
+        if section_write_buffer.enabled:
+            # Content autosaves are coalesced in the write-behind buffer and written within its window
+            pending = section_write_buffer.put(section.id, section.project_id, section_update.content)
+        else:
+            section.content = section_update.content
     if section_update.liked is not None:
         section.liked = section_update.liked
     if section_update.comment is not None:
         section.comment = section_update.comment
     
-    db.commit()
-    db.refresh(section)
+    if db.is_modified(section):
+        db.commit()
+        invalidate_project_exports(section.project_id)
+        db.refresh(section)
+    if pending is not None:
+        return SectionResponse.model_validate(section).model_copy(
+            update={"content": pending.content, "updated_at": pending.edited_at}
+        )
     return section
 
+@router.patch("/{project_id}/sections", response_model=List[SectionResponse])
+def update_sections(
+    project_id: int,
+    batch: SectionBatchUpdate,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Update many sections of a project in a single transaction"""
+    project = get_user_project(db, project_id, current_user.id)
+    
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    sections = {section.id: section for section in project.sections}
+    missing = [item.id for item in batch.sections if item.id not in sections]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sections not found in project: {missing}"
+        )
+    
+    for item in batch.sections:
+        section = sections[item.id]
+        if item.content is not None:
+            section.content = item.content
+        if item.liked is not None:
+            section.liked = item.liked
+        if item.comment is not None:
+            section.comment = item.comment
+    
+    # Serialize after the flush (which sets updated_at) so commit's expiry costs no reloads
+    db.flush()
+    updated = [SectionResponse.model_validate(sections[item.id]) for item in batch.sections]
+    db.commit()
+    invalidate_project_exports(project.id)
+    return updated
+
+@router.get("/sections/{section_id}/revisions", response_model=List[RevisionResponse])
+async def list_section_revisions(
+    section_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Refinement history of a section, oldest first"""
+    section = await get_user_section_async(db, section_id, current_user.id)
+    
+    if not section:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Section not found"
+        )
+    
+    revisions = await list_section_revisions_async(db, section.id)
+    return [
+        RevisionResponse(
+            id=revision.id,
+            prompt=revision.prompt,
+            previous_content=previous_content,
+            new_content=new_content,
+            created_at=revision.created_at
+        )
+        for revision, previous_content, new_content in revisions
+    ]
+
 @router.post("/refine-content", response_model=SectionResponse)
-def refine_content(
+async def refine_content(
     request: RefineContentRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Refine section content using AI"""
-    section = db.query(Section).join(Project).filter(
-        Section.id == request.section_id,
-        Project.user_id == current_user.id
-    ).first()
+    section = await get_user_section_async(db, request.section_id, current_user.id)
     
     if not section:
         raise HTTPException(
@@ -210,59 +306,170 @@ def refine_content(
             detail="Section not found"
         )
     
-    # Store revision history
-    revision = Revision(
-        section_id=section.id,
-        prompt=request.prompt,
-        previous_content=section.content,
-        new_content=""  # Will be updated
-    )
-    
     # Get project to check document type
     project = section.project
     
     # Generate refined content
-    refined_content = llm_service.refine_content(
-        current_content=section.content,
-        refinement_prompt=request.prompt,
-        section_title=section.title,
-        document_type=project.document_type.value
-    )
+    try:
+        refined_content = await async_llm_service.refine_content(
+            current_content=section.content,
+            refinement_prompt=request.prompt,
+            section_title=section.title,
+            document_type=project.document_type.value,
+            user_id=current_user.id
+        )
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
     
-    revision.new_content = refined_content
+    # Store revision history
+    await add_revision_async(db, section.id, request.prompt, section.content, refined_content)
     section.content = refined_content
     
-    db.add(revision)
-    db.commit()
-    db.refresh(section)
+    await db.commit()
+    invalidate_project_exports(section.project_id)
+    await db.refresh(section)
     return section
 
+def _llm_unavailable(error: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"AI service unavailable, please retry: {str(error)}",
+        headers={"Retry-After": "10"},
+    )
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check: "*" or any listed tag equal to etag under weak comparison (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def _sse(data: dict, event: str = None) -> str:
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data, default=str)}\n\n"
+
+async def _stream_section_update(
+    section_id: int,
+    deltas: AsyncIterator[str],
+    revision_prompt: str = None
+) -> AsyncIterator[str]:
+    """
+    Forward LLM deltas as server-sent events, then persist the final text to the
+    section (and a Revision when refining) and send it as a 'done' event.
+    Nothing is saved if the stream fails part way.
+    """
+    chunks = []
+    try:
+        async for delta in deltas:
+            chunks.append(delta)
+            yield _sse({"delta": delta})
+    except Exception as e:
+        yield _sse({"detail": f"Error generating content: {str(e)}"}, event="error")
+        return
+    
+    content = "".join(chunks).strip()
+    # The request-scoped session is already closed once the response starts streaming
+    # Buffered autosaves go first, so they can't land on top of the new text later
+    if section_write_buffer.needs_flush(section_id=section_id):
+        await asyncio.to_thread(section_write_buffer.flush_section, section_id)
+    async with AsyncSessionLocal() as db:
+        section = await db.get(Section, section_id)
+        if section is None:
+            # Deleted (with its project) while the text was streaming
+            yield _sse({"detail": "Section not found"}, event="error")
+            return
+        if revision_prompt is not None:
+            await add_revision_async(db, section.id, revision_prompt, section.content, content)
+        section.content = content
+        await db.commit()
+        invalidate_project_exports(section.project_id)
+        await db.refresh(section)
+        yield _sse(SectionResponse.model_validate(section).model_dump(mode="json"), event="done")
+
+@router.post("/sections/{section_id}/generate/stream")
+async def generate_section_stream(
+    section_id: int,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Generate AI content for one section, streamed as server-sent events"""
+    section = await get_user_section_async(db, section_id, current_user.id)
+    
+    if not section:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Section not found"
+        )
+    
+    deltas = async_llm_service.stream_generate_content(
+        section_title=section.title,
+        main_topic=section.project.main_topic,
+        document_type=section.project.document_type.value,
+        user_id=current_user.id
+    )
+    return StreamingResponse(
+        _stream_section_update(section.id, deltas),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/refine-content/stream")
+async def refine_content_stream(
+    request: RefineContentRequest,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Refine section content using AI, streamed as server-sent events"""
+    section = await get_user_section_async(db, request.section_id, current_user.id)
+    
+    if not section:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Section not found"
+        )
+    
+    deltas = async_llm_service.stream_refine_content(
+        current_content=section.content,
+        refinement_prompt=request.prompt,
+        section_title=section.title,
+        document_type=section.project.document_type.value,
+        user_id=current_user.id
+    )
+    return StreamingResponse(
+        _stream_section_update(section.id, deltas, revision_prompt=request.prompt),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/ai-suggest", response_model=List[str])
-def ai_suggest_outline(
+async def ai_suggest_outline(
     request: AISuggestRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Generate AI-suggested outline/slide titles"""
     doc_type = "docx" if request.document_type == "docx" else "pptx"
-    titles = llm_service.suggest_outline(
-        main_topic=request.main_topic,
-        document_type=doc_type,
-        num_items=request.num_items
-    )
+    try:
+        titles = await async_llm_service.suggest_outline(
+            main_topic=request.main_topic,
+            document_type=doc_type,
+            num_items=request.num_items,
+            user_id=current_user.id
+        )
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
     return titles
 
 @router.get("/{project_id}/export")
 def export_document(
     project_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Export project as .docx or .pptx file"""
-    project = db.query(Project).filter(
-        Project.id == project_id,
-        Project.user_id == current_user.id
-    ).first()
+    project = get_user_project(db, project_id, current_user.id)
     
     if not project:
         raise HTTPException(
@@ -270,19 +477,56 @@ def export_document(
             detail="Project not found"
         )
     
-    sections = db.query(Section).filter(Section.project_id == project_id).all()
+    sections = project.sections
     
     if project.document_type == DocumentType.DOCX:
-        file_stream = document_service.generate_docx(project, sections)
-        filename = f"{project.title}.docx"
+        extension = "docx"
         media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     else:
-        file_stream = document_service.generate_pptx(project, sections)
-        filename = f"{project.title}.pptx"
+        extension = "pptx"
         media_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+    filename = f"{project.title}.{extension}"
     
-    return StreamingResponse(
-        file_stream,
+    # The digest identifies the rendered bytes, so it doubles as the ETag
+    digest = export_digest(project, sections)
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # Either way the response gets its own file, removed once sent
+    cached_path = export_cache.get(project.id, digest, extension) if export_cache else None
+    if cached_path is not None:
+        return FileResponse(
+            cached_path,
+            media_type=media_type,
+            filename=filename,
+            headers=headers,
+            background=BackgroundTask(os.remove, cached_path)
+        )
+    
+    # Render straight to disk and send the file in chunks, so memory stays flat for big decks
+    if export_cache is not None:
+        rendered_path = export_cache.temp_path(extension)
+    else:
+        fd, rendered_path = tempfile.mkstemp(suffix=f".{extension}")
+        os.close(fd)
+    try:
+        # Rendering is CPU bound; ship a plain snapshot to the render pool
+        complete = render_executor.render(project_snapshot(project, sections), rendered_path)
+        if export_cache is not None and complete:
+            export_cache.store(project.id, digest, extension, rendered_path)
+    except Exception:
+        os.remove(rendered_path)
+        raise
+    
+    if not complete:
+        # Rendered while image fetching failed: sent without the digest ETag and not cached, so the next export retries
+        headers = {"Cache-Control": "no-store"}
+    return FileResponse(
+        rendered_path,
         media_type=media_type,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        filename=filename,
+        headers=headers,
+        background=BackgroundTask(os.remove, rendered_path)
     )
@@ -1,17 +1,20 @@
 from app.schemas.user import UserCreate, UserResponse, Token, TokenData
 from app.schemas.project import (
-    ProjectCreate, ProjectResponse, ProjectListResponse,
-    SectionCreate, SectionResponse, SectionUpdate,
+    ProjectCreate, ProjectResponse, ProjectListResponse, ProjectListPage,
+    SectionCreate, SectionResponse, SectionUpdate, SectionBatchItem, SectionBatchUpdate, RevisionResponse,
     ProjectUpdate,
     GenerateContentRequest, RefineContentRequest, AISuggestRequest,
     DocumentTypeEnum
 )
+from app.schemas.job import JobResponse, JobItemResponse, JobStatusEnum
 
 __all__ = [
     "UserCreate", "UserResponse", "Token", "TokenData",
-    "ProjectCreate", "ProjectResponse", "ProjectListResponse",
+    "ProjectCreate", "ProjectResponse", "ProjectListResponse", "ProjectListPage",
     "ProjectUpdate",
-    "SectionCreate", "SectionResponse", "SectionUpdate",
+    "SectionCreate", "SectionResponse", "SectionUpdate", "SectionBatchItem", "SectionBatchUpdate",
+    "RevisionResponse",
     "GenerateContentRequest", "RefineContentRequest", "AISuggestRequest",
-    "DocumentTypeEnum"
+    "DocumentTypeEnum",
+    "JobResponse", "JobItemResponse", "JobStatusEnum"
 ]
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from enum import Enum
+
+class JobStatusEnum(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobItemResponse(BaseModel):
+    section_id: int
+    status: JobStatusEnum
+    error: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class JobResponse(BaseModel):
+    id: int
+    project_id: int
+    status: JobStatusEnum
+    total_sections: int
+    completed_sections: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    items: List[JobItemResponse] = []
+    
+    class Config:
+        from_attributes = True
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -19,6 +19,21 @@ class SectionUpdate(BaseModel):
     liked: Optional[bool] = None
     comment: Optional[str] = None
 
+class SectionBatchItem(SectionUpdate):
+    id: int
+
+class SectionBatchUpdate(BaseModel):
+    sections: List[SectionBatchItem]
+    
+    @field_validator('sections')
+    @classmethod
+    def validate_unique_ids(cls, v):
+        ids = [item.id for item in v]
+        duplicates = sorted({section_id for section_id in ids if ids.count(section_id) > 1})
+        if duplicates:
+            raise ValueError(f'Duplicate section ids: {duplicates}')
+        return v
+
 class SectionResponse(SectionBase):
     id: int
     content: str
@@ -30,6 +45,13 @@ class SectionResponse(SectionBase):
     class Config:
         from_attributes = True
 
+class RevisionResponse(BaseModel):
+    id: int
+    prompt: str
+    previous_content: str
+    new_content: str
+    created_at: datetime
+
 class ProjectBase(BaseModel):
     title: str
     document_type: DocumentTypeEnum
@@ -58,13 +80,18 @@ class ProjectListResponse(BaseModel):
     id: int
     title: str
     document_type: DocumentTypeEnum
-    main_topic: str
+    topic_preview: str  # main_topic, truncated for the dashboard
     created_at: datetime
     updated_at: datetime
+    section_count: Optional[int] = None  # Only when requested with include_section_counts
     
     class Config:
         from_attributes = True
 
+class ProjectListPage(BaseModel):
+    items: List[ProjectListResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page; None on the last page
+
 class GenerateContentRequest(BaseModel):
     project_id: int
 
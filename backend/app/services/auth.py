@@ -1,25 +1,148 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models import User
 from app.config import get_settings
+from app.services.cache import MemoryLRUCache
+import asyncio
+import threading
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify operations are already queued"""
+
+class PasswordHasher:
+    """
+    Runs bcrypt hash/verify on a small dedicated thread pool (bcrypt releases the
+    GIL) so logins never block the event loop. At most max_pending operations may
+    be running or queued; beyond that callers get PasswordHasherBusy instead of
+    piling up latency. Hashes made with a different cost than `rounds` are
+    reported as needing an update, so they get rehashed on the next login.
+    """
+    
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds
+        )
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+    
+    @staticmethod
+    def _truncate(password: str) -> str:
+        # Truncate password to 72 bytes for bcrypt compatibility
+        password_bytes = password.encode('utf-8')
+        if len(password_bytes) > 72:
+            # Truncate at byte boundary, not character boundary
+            password = password_bytes[:72].decode('utf-8', errors='ignore')
+        return password
+    
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+    
+    def _release(self, _future: Future):
+        with self._lock:
+            self._pending -= 1
+    
+    def hash(self, password: str) -> str:
+        return self._submit(self.context.hash, self._truncate(password)).result()
+    
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return self._submit(self.context.verify_and_update, password, hashed_password).result()
+    
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(self.context.hash, self._truncate(password)))
+    
+    async def verify_and_update_async(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(
+            self._submit(self.context.verify_and_update, password, hashed_password)
+        )
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": self._pending, "max_pending": self.max_pending, "rejected": self.rejected}
+
+password_hasher = PasswordHasher(
+    rounds=settings.bcrypt_rounds,
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending
+)
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Detached snapshot of the authenticated user, safe to cache across requests"""
+    id: int
+    email: str
+    username: str
+    created_at: datetime
+    
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(id=user.id, email=user.email, username=user.username, created_at=user.created_at)
+
+class PrincipalCache:
+    """
+    Bounded TTL/LRU map of username -> UserPrincipal so get_current_user skips the
+    database in steady state. Invalidation is per process; the TTL bounds how long
+    another worker can keep serving a stale snapshot.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._cache = MemoryLRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    
+    def get(self, username: str) -> Optional[UserPrincipal]:
+        return self._cache.get(username)
+    
+    def put(self, principal: UserPrincipal):
+        self._cache.set(principal.username, principal, size=1)
+    
+    def invalidate(self, username: str):
+        self._cache.delete(username)
+    
+    def clear(self):
+        self._cache.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+principal_cache = PrincipalCache(settings.principal_cache_size, settings.principal_cache_ttl_seconds)
+
+def invalidate_user(username: str):
+    """Call after changing or deleting a user outside the ORM"""
+    principal_cache.invalidate(username)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_write(mapper, connection, target: User):
+    # Drop the old key too when the username itself changed
+    for username in {target.username, *inspect(target).attrs.username.history.deleted}:
+        invalidate_user(username)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
-    # Truncate password to 72 bytes for bcrypt compatibility
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        # Truncate at byte boundary, not character boundary
-        password = password_bytes[:72].decode('utf-8', errors='ignore')
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -39,9 +162,37 @@ def authenticate_user(db: Session, username: str, password: str):
         return False
     return user
 
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    """Verify credentials off the event loop, upgrading the stored hash if its cost is outdated"""
+    user = await get_user_by_username_async(db, username)
+    if not user:
+        return False
+    valid, new_hash = await password_hasher.verify_and_update_async(password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalar_one_or_none()
+
+async def get_principal(db: AsyncSession, username: str) -> Optional[UserPrincipal]:
+    """Resolve a token subject to a principal, hitting the database only on a cache miss"""
+    principal = principal_cache.get(username)
+    if principal is None:
+        user = await get_user_by_username_async(db, username)
+        if user is None:
+            return None
+        principal = UserPrincipal.from_user(user)
+        principal_cache.put(principal)
+    return principal
+
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
@@ -0,0 +1,374 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Protocol
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+def content_key(*parts) -> str:
+    """Stable SHA-256 key over JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class Cache(Protocol):
+    """Anything with bytes get/set can back a service cache"""
+    
+    def get(self, key: str) -> Optional[bytes]: ...
+    
+    def set(self, key: str, value: bytes) -> None: ...
+    
+    async def get_async(self, key: str) -> Optional[bytes]: ...
+    
+    async def set_async(self, key: str, value: bytes) -> None: ...
+
+class MemoryLRUCache:
+    """Thread-safe in-process LRU with optional TTL and entry/byte limits"""
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: str, value, size: Optional[int] = None):
+        if size is None:
+            size = len(value) if isinstance(value, (bytes, str)) else 1
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    async def get_async(self, key: str):
+        return self.get(key)
+    
+    async def set_async(self, key: str, value, size: Optional[int] = None):
+        self.set(key, value, size)
+    
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+    
+    def _remove(self, key: str):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+class SQLiteCache:
+    """
+    Persistent key/bytes cache in a single SQLite file, shared by every worker
+    process on the host. Entries expire after ttl_seconds; once the stored
+    payload exceeds max_bytes the least recently used entries are evicted.
+    Like BlobStore, the byte total is kept running per process and only
+    recounted when it crosses max_bytes, so several writers may briefly run
+    the file over its cap. The *_async methods run on a thread.
+    """
+    
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)")
+            self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            self._conn = conn
+        return self._conn
+    
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None or (row[1] is not None and row[1] < now):
+                    if row is not None:
+                        conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                        conn.commit()
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+                return bytes(row[0])
+        except sqlite3.Error as e:
+            print(f"Cache read error ({self.path}): {str(e)}")
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, value: bytes):
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), expires_at, now)
+                )
+                self._bytes += len(value)
+                if self._bytes > self.max_bytes:
+                    self._evict(conn, now)
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Cache write error ({self.path}): {str(e)}")
+    
+    async def get_async(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+    
+    async def set_async(self, key: str, value: bytes):
+        await asyncio.to_thread(self.set, key, value)
+    
+    def delete(self, key: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            conn.commit()
+    
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        # Recount: replaced keys and other processes' writes make the running total drift
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        # Drop to 90% of max_bytes so a full cache doesn't recount on every set
+        target = self.max_bytes * 0.9
+        if total > self.max_bytes:
+            # Walk entries from least recently used until we are back under the target
+            doomed = []
+            for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+                if total <= target:
+                    break
+                doomed.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+            self.evictions += len(doomed)
+        self._bytes = total
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            try:
+                entries, size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+                ).fetchone()
+            except sqlite3.Error:
+                entries, size = 0, 0
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+class TieredCache:
+    """Memory LRU in front of a persistent tier; disk hits are promoted to memory"""
+    
+    def __init__(self, memory: MemoryLRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+    
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+    
+    def set(self, key: str, value: bytes):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+    
+    async def get_async(self, key: str) -> Optional[bytes]:
+        """get() for the event loop: memory hits inline, the disk tier on a thread"""
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await self.disk.get_async(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+    
+    async def set_async(self, key: str, value: bytes):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await self.disk.set_async(key, value)
+    
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+class BlobStore:
+    """
+    Content-addressed files on local disk, at <directory>/<first 2 hex>/<sha256>.
+    Identical bytes are stored once however many keys refer to them. Reads
+    touch the file's mtime, and once the store grows past max_bytes the least
+    recently read blobs are evicted, so a reference may outlive its blob:
+    callers treat a missing blob as a cache miss.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._bytes = sum(size for _, size, _ in self._entries())
+    
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+    
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+    
+    def get(self, digest: str) -> Optional[bytes]:
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+    
+    def put(self, data: bytes) -> str:
+        """Store data (a no-op if it is already there) and return its digest"""
+        digest = self.digest(data)
+        path = self._path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique across threads and processes sharing the directory
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # Atomic rename; a concurrent writer of the same digest writes the same bytes
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        with self._lock:
+            self._bytes += len(data)
+            if self._bytes > self.max_bytes:
+                self._evict()
+        return digest
+    
+    def _entries(self):
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def _evict(self):
+        # Drop to 90% of max_bytes so a full store doesn't rescan on every put
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._bytes = total
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -5,13 +5,44 @@ from pptx import Presentation
 from pptx.util import Inches as PptxInches, Pt as PptxPt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
-from typing import List
+from copy import deepcopy
+from dataclasses import dataclass
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import BinaryIO, Dict, List, Optional, Union
+from PIL import Image
 from app.models import Project, Section
 from app.services.image import image_service
+from app.services.image_processing import ImageFit
+from app.config import get_settings
 import io
 
-class DocumentService:
+settings = get_settings()
+
+# Where content slides place their picture, in inches
+CONTENT_IMAGE_LEFT, CONTENT_IMAGE_TOP = 0.5, 1.7
+CONTENT_IMAGE_WIDTH, CONTENT_IMAGE_HEIGHT = 4.2, 4.8
+
+@dataclass
+class SlideSkeleton:
+    """
+    The shapes of a deck's slides for one template and font size, as XML.
     
+    Compiled once per process by running the regular slide builders on a
+    scratch deck with empty text; every real slide then deep-copies these
+    elements and only adds its text (and image), instead of rebuilding each
+    shape, fill and font through python-pptx.
+    """
+    title_shapes: list
+    content_background: object
+    content_header: list
+    content_box: object
+    content_box_beside_image: object
+    bullet: object
+    placeholder: object
+
+class DocumentService:
+
     # Template color schemes
     TEMPLATES = {
         "modern": {
@@ -45,8 +76,11 @@ class DocumentService:
         """Get color scheme for a template"""
         return DocumentService.TEMPLATES.get(template_name, DocumentService.TEMPLATES["modern"])
     @staticmethod
-    def generate_docx(project: Project, sections: List[Section]) -> io.BytesIO:
-        """Generate a Word document from project sections"""
+    def generate_docx(project: Project, sections: List[Section], target: Union[str, BinaryIO, None] = None):
+        """
+        Generate a Word document from project sections.
+        Writes to target (a path or binary file) if given, else returns a BytesIO.
+        """
         doc = Document()
         
         # Add title
@@ -74,43 +108,149 @@ class DocumentService:
             # Add space between sections
             doc.add_paragraph()
         
-        # Save to BytesIO
-        file_stream = io.BytesIO()
-        doc.save(file_stream)
-        file_stream.seek(0)
-        return file_stream
+        return DocumentService._save(doc, target)
     
     @staticmethod
-    def generate_pptx(project: Project, sections: List[Section], include_images: bool = True) -> io.BytesIO:
-        """Generate a PowerPoint presentation with professional templates and images"""
+    def generate_pptx(
+        project: Project,
+        sections: List[Section],
+        include_images: bool = True,
+        target: Union[str, BinaryIO, None] = None,
+        report: Optional[Dict[str, int]] = None
+    ):
+        """
+        Generate a PowerPoint presentation with professional templates and images.
+        Writes to target (a path or binary file) if given, else returns a BytesIO.
+        If given, report["images_failed"] is set to the number of slides whose
+        image lookup failed (rather than found nothing).
+        """
         prs = Presentation()
         prs.slide_width = PptxInches(10)
         prs.slide_height = PptxInches(7.5)
         
-        # Get template colors
-        colors = DocumentService.get_template_colors(project.template if hasattr(project, 'template') else "modern")
+        # Template colors and fonts, compiled into slide skeletons once per process
+        template = project.template if hasattr(project, 'template') else "modern"
         font_size = project.font_size if hasattr(project, 'font_size') and project.font_size else 20
+        skeleton = compile_slide_skeleton(template, font_size)
         
         # Sort sections by order
         sorted_sections = sorted(sections, key=lambda s: s.order)
         
+        # Resolve every content slide's image up front, concurrently, before layout starts
+        images = {}
+        failed = 0
+        if include_images:
+            # Downloaded photos are cropped and scaled to the picture box before embedding
+            fit = ImageFit.for_box(
+                CONTENT_IMAGE_WIDTH, CONTENT_IMAGE_HEIGHT, settings.image_dpi, settings.image_jpeg_quality
+            )
+            queries = {
+                idx: DocumentService._image_queries(section)
+                for idx, section in enumerate(sorted_sections) if idx > 0
+            }
+            images = image_service.prefetch(queries, fit=fit)
+            failed = len(queries) - len(images)
+        if report is not None:
+            report["images_failed"] = failed
+        
         for idx, section in enumerate(sorted_sections):
             if idx == 0:
                 # First slide - Professional Title Slide
-                DocumentService._create_title_slide(prs, section, project, include_images, colors)
+                DocumentService._stamp_title_slide(prs, skeleton, section, project)
             else:
-                # Content slides with images
-                DocumentService._create_content_slide(prs, section, include_images, colors, font_size)
+                # Content slides with images (release each image's bytes once embedded)
+                DocumentService._stamp_content_slide(prs, skeleton, section, images.pop(idx, None))
         
-        # Save to BytesIO
+        return DocumentService._save(prs, target)
+    
+    @staticmethod
+    def _save(document, target: Union[str, BinaryIO, None]):
+        """Save straight to a file when given one, so no second in-memory copy is made"""
+        if target is not None:
+            document.save(target)
+            return target
         file_stream = io.BytesIO()
-        prs.save(file_stream)
+        document.save(file_stream)
         file_stream.seek(0)
         return file_stream
     
+    @staticmethod
+    def _add_shapes(slide, elements: list) -> list:
+        """Append copies of skeleton shapes to a slide, renumbered the way python-pptx numbers new shapes"""
+        spTree = slide.shapes._spTree
+        next_id = slide.shapes._next_shape_id
+        copies = []
+        for element in elements:
+            element = deepcopy(element)
+            cNvPr = element.xpath("./*[1]/p:cNvPr")[0]
+            cNvPr.id = next_id
+            cNvPr.name = f"{cNvPr.name.rsplit(' ', 1)[0]} {next_id - 1}"
+            spTree.insert_element_before(element, "p:extLst")
+            copies.append(element)
+            next_id += 1
+        return copies
+    
+    @staticmethod
+    def _fill_text(txBody, text: str):
+        """Same result as TextFrame.text = text on a frame whose first paragraph is already formatted"""
+        first, *rest = text.split("\n")
+        txBody.p_lst[0].append_text(first)
+        for line in rest:
+            txBody.add_p().append_text(line)
+    
+    @staticmethod
+    def _stamp_title_slide(prs: Presentation, skeleton: SlideSkeleton, section: Section, project: Project):
+        """Title slide from the compiled skeleton (see _create_title_slide for its design)"""
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        _, _, title_box, subtitle_box = DocumentService._add_shapes(slide, skeleton.title_shapes)
+        DocumentService._fill_text(title_box.txBody, section.title)
+        DocumentService._fill_text(subtitle_box.txBody, project.main_topic)
+    
+    @staticmethod
+    def _stamp_content_slide(prs: Presentation, skeleton: SlideSkeleton, section: Section, image_data: Optional[bytes]):
+        """Content slide from the compiled skeleton (see _create_content_slide for its design)"""
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide._element.cSld.insert(0, deepcopy(skeleton.content_background))
+        _, title_box = DocumentService._add_shapes(slide, skeleton.content_header)
+        DocumentService._fill_text(title_box.txBody, section.title)
+        
+        image_added = False
+        if image_data:
+            try:
+                slide.shapes.add_picture(
+                    io.BytesIO(image_data),
+                    PptxInches(CONTENT_IMAGE_LEFT), PptxInches(CONTENT_IMAGE_TOP),
+                    width=PptxInches(CONTENT_IMAGE_WIDTH), height=PptxInches(CONTENT_IMAGE_HEIGHT)
+                )
+                image_added = True
+            except Exception as e:
+                print(f"Error adding image for '{section.title}': {e}")
+        
+        content_box = skeleton.content_box_beside_image if image_added else skeleton.content_box
+        txBody = DocumentService._add_shapes(slide, [content_box])[0].txBody
+        if not section.content:
+            txBody.replace(txBody.p_lst[0], deepcopy(skeleton.placeholder))
+            return
+        
+        lines = [line.strip() for line in section.content.strip().split('\n') if line.strip()]
+        for i, line in enumerate(lines):
+            # Remove any existing bullet characters
+            line = line.lstrip('•-*►▪').strip()
+            if not line:
+                continue
+            p = deepcopy(skeleton.bullet)
+            p.append_text("• " + line if i > 0 or len(lines) > 1 else line)
+            if i == 0:
+                txBody.replace(txBody.p_lst[0], p)
+            else:
+                txBody.append(p)
+    
     @staticmethod
     def _create_title_slide(prs: Presentation, section: Section, project: Project, include_images: bool, colors: dict):
-        """Create a modern, professional title slide with gradient effect"""
+        """
+        Create a modern, professional title slide with gradient effect.
+        generate_pptx stamps slides from a skeleton compiled with this builder.
+        """
         slide = prs.slides.add_slide(prs.slide_layouts[6])
         
         # Gradient background simulation with shapes
@@ -163,8 +303,20 @@ class DocumentService:
         subtitle_para.font.color.rgb = colors["accent"]
     
     @staticmethod
-    def _create_content_slide(prs: Presentation, section: Section, include_images: bool, colors: dict, font_size: int = 20):
-        """Create modern content slide with image and styled bullets"""
+    def _image_queries(section: Section) -> List[str]:
+        """Search terms to try in order for a slide's image"""
+        return [
+            section.title,
+            f"{section.title} business",
+            f"{section.title} professional"
+        ]
+    
+    @staticmethod
+    def _create_content_slide(prs: Presentation, section: Section, image_data: Optional[bytes], colors: dict, font_size: int = 20):
+        """
+        Create modern content slide with image and styled bullets.
+        generate_pptx stamps slides from a skeleton compiled with this builder.
+        """
         slide = prs.slides.add_slide(prs.slide_layouts[6])
         
         # White background
@@ -197,35 +349,20 @@ class DocumentService:
         title_para.font.bold = True
         title_para.font.color.rgb = RGBColor(255, 255, 255)
         
-        # Try to fetch and add image
+        # Add the prefetched image, if any
         image_added = False
-        if include_images:
-            # Try multiple search terms for better image results
-            search_queries = [
-                section.title,
-                f"{section.title} business",
-                f"{section.title} professional"
-            ]
-            
-            for query in search_queries:
-                image_url = image_service.search_image(query)
-                if image_url:
-                    try:
-                        image_data = image_service.download_image(image_url)
-                        if image_data:
-                            image_stream = io.BytesIO(image_data)
-                            # Add image on the left with rounded effect
-                            pic = slide.shapes.add_picture(
-                                image_stream,
-                                PptxInches(0.5), PptxInches(1.7),
-                                width=PptxInches(4.2), height=PptxInches(4.8)
-                            )
-                            image_added = True
-                            print(f"Image added for: {section.title}")
-                            break
-                    except Exception as e:
-                        print(f"Error adding image for '{query}': {e}")
-                        continue
+        if image_data:
+            try:
+                image_stream = io.BytesIO(image_data)
+                # Add image on the left with rounded effect
+                pic = slide.shapes.add_picture(
+                    image_stream,
+                    PptxInches(CONTENT_IMAGE_LEFT), PptxInches(CONTENT_IMAGE_TOP),
+                    width=PptxInches(CONTENT_IMAGE_WIDTH), height=PptxInches(CONTENT_IMAGE_HEIGHT)
+                )
+                image_added = True
+            except Exception as e:
+                print(f"Error adding image for '{section.title}': {e}")
         
         # Position content based on whether image was added
         if image_added:
@@ -279,4 +416,47 @@ class DocumentService:
             p.font.italic = True
             p.font.color.rgb = RGBColor(150, 150, 150)
 
+def _shape_elements(slide) -> list:
+    return [shape._element for shape in slide.shapes]
+
+def _without_runs(paragraph):
+    for child in paragraph.content_children:
+        paragraph.remove(child)
+    return paragraph
+
+@lru_cache(maxsize=32)
+def compile_slide_skeleton(template: str, font_size: int) -> SlideSkeleton:
+    """Build (once per template and font size) the skeleton generate_pptx stamps slides from"""
+    colors = DocumentService.get_template_colors(template)
+    scratch = Presentation()
+    
+    DocumentService._create_title_slide(
+        scratch, SimpleNamespace(title=""), SimpleNamespace(main_topic=""), False, colors
+    )
+    DocumentService._create_content_slide(scratch, SimpleNamespace(title="", content="x"), None, colors, font_size)
+    DocumentService._create_content_slide(scratch, SimpleNamespace(title="", content=""), None, colors, font_size)
+    pixel = io.BytesIO()
+    Image.new("RGB", (1, 1)).save(pixel, format="PNG")
+    DocumentService._create_content_slide(scratch, SimpleNamespace(title="", content="x"), pixel.getvalue(), colors, font_size)
+    title_slide, content_slide, empty_slide, image_slide = scratch.slides
+    
+    header = _shape_elements(content_slide)[:2]
+    content_box = _shape_elements(content_slide)[2]
+    beside_image = _shape_elements(image_slide)[3]
+    bullet = _without_runs(content_box.txBody.p_lst[0])
+    content_box.txBody.remove(bullet)
+    beside_image.txBody.remove(beside_image.txBody.p_lst[0])
+    for box in (content_box, beside_image):
+        # The empty first paragraph every new textbox starts with
+        box.txBody.add_p()
+    return SlideSkeleton(
+        title_shapes=_shape_elements(title_slide),
+        content_background=content_slide._element.cSld.bg,
+        content_header=header,
+        content_box=content_box,
+        content_box_beside_image=beside_image,
+        bullet=bullet,
+        placeholder=_shape_elements(empty_slide)[2].txBody.p_lst[0]
+    )
+
 document_service = DocumentService()
@@ -0,0 +1,156 @@
+from typing import Dict, List, Optional
+from app.models import DocumentType, Project, Section
+from app.services.cache import content_key
+from app.config import get_settings
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+settings = get_settings()
+
+# Bump when DocumentService output changes so old artifacts are not served
+RENDER_VERSION = 2
+
+STALE_TEMP_SECONDS = 3600
+
+def export_digest(project: Project, sections: List[Section]) -> str:
+    """Digest of everything that affects the rendered file"""
+    return content_key(
+        "export",
+        RENDER_VERSION,
+        project.document_type.value,
+        project.title,
+        project.main_topic,
+        project.template,
+        project.font_size,
+        # Slide photos depend on these; docx has none
+        (settings.image_dpi, settings.image_jpeg_quality, bool(settings.pexels_api_key))
+        if project.document_type == DocumentType.PPTX else None,
+        [(section.order, section.title, section.content) for section in sorted(sections, key=lambda s: (s.order, s.id))]
+    )
+
+class ExportCache:
+    """
+    Rendered .docx/.pptx files on local disk, at "<project_id>/<digest>.<ext>".
+    Reads touch the file's mtime so eviction drops the least recently served
+    artifacts once the directory grows past max_bytes. Each project has its own
+    subdirectory, so invalidating one never scans the others.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def _project_dir(self, project_id: int) -> str:
+        return os.path.join(self.directory, str(project_id))
+    
+    def _path(self, project_id: int, digest: str, extension: str) -> str:
+        return os.path.join(self._project_dir(project_id), f"{digest}.{extension}")
+    
+    def get(self, project_id: int, digest: str, extension: str) -> Optional[str]:
+        """
+        A private link to the cached file, or None on a miss. The caller sends
+        and then removes it, so invalidation or eviction can't pull the file
+        out from under a response.
+        """
+        path = self._path(project_id, digest, extension)
+        try:
+            os.utime(path)
+            link = self._link(path, extension)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return link
+    
+    def temp_path(self, extension: str) -> str:
+        """Path in the cache directory to render into before store()"""
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=f".{extension}.tmp")
+        os.close(fd)
+        return path
+    
+    def _link(self, source: str, extension: str) -> str:
+        # A hard link costs no copy; fall back to copying where links aren't supported
+        path = os.path.join(self.directory, f"{uuid.uuid4().hex}.{extension}.tmp")
+        try:
+            os.link(source, path)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copyfile(source, path)
+        return path
+    
+    def store(self, project_id: int, digest: str, extension: str, rendered_path: str):
+        """Publish a fully rendered file; the caller still owns (sends and removes) rendered_path"""
+        path = self._path(project_id, digest, extension)
+        published = self._link(rendered_path, extension)
+        # Atomic rename, so readers never see a partial file
+        try:
+            os.replace(published, path)
+        except FileNotFoundError:
+            # No project directory yet, or an invalidate() just removed it
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(published, path)
+        self._evict()
+    
+    def invalidate(self, project_id: int):
+        """Drop every cached artifact for a project"""
+        shutil.rmtree(self._project_dir(project_id), ignore_errors=True)
+    
+    def _entries(self):
+        entries = []
+        now = time.time()
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if name.endswith(".tmp"):
+                        # Leftover from a render that died before store()
+                        if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                            os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+    
+    def stats(self) -> Dict[str, float]:
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+export_cache = ExportCache(settings.export_cache_dir, settings.export_cache_max_bytes) if settings.export_cache_dir else None
+
+def invalidate_project_exports(project_id: int):
+    if export_cache is not None:
+        export_cache.invalidate(project_id)
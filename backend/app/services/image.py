@@ -1,22 +1,56 @@
 import requests
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Hashable, List, Optional
 from app.config import get_settings
+from app.services.cache import BlobStore, Cache, SQLiteCache
+from app.services.image_processing import ImageFit, normalize_image
+import threading
 
 settings = get_settings()
 
+class ImageFetchError(Exception):
+    """A search or download failed (as opposed to finding nothing)"""
+
 class ImageService:
-    def __init__(self):
+    def __init__(self, cache: Optional[Cache] = None, blobs: Optional[BlobStore] = None):
         self.pexels_api_key = settings.pexels_api_key if hasattr(settings, 'pexels_api_key') else None
-        self.base_url = "https://api.pexels.com/v1/search"
+        self.base_url = f"{settings.pexels_base_url.rstrip('/')}/search"
+        self.max_concurrency = settings.image_max_concurrency
+        # query -> URL and URL -> bytes, so repeat exports never touch the network
+        self.cache = cache
+        # With a blob store the cache maps URL -> content hash, and each distinct image is stored once
+        self.blobs = blobs
+        # Downloads in progress, so slides (or exports) wanting the same URL share one request
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # One pooled session keeps TLS connections to Pexels alive across requests and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
     def search_image(self, query: str, orientation: str = "landscape") -> Optional[str]:
         """
         Search for a relevant image using Pexels API
         Returns image URL or None if not found/API key missing
         """
+        try:
+            return self._search(query, orientation)
+        except ImageFetchError:
+            return None
+    
+    def _search(self, query: str, orientation: str = "landscape") -> Optional[str]:
         if not self.pexels_api_key:
             return None
         
+        cache_key = f"search:{orientation}:{query}"
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            # An empty value records a search that found nothing
+            return cached.decode("utf-8") or None
+        
         try:
             headers = {
                 "Authorization": self.pexels_api_key
@@ -28,31 +62,150 @@ class ImageService:
                 "size": "medium"
             }
             
-            response = requests.get(self.base_url, headers=headers, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("photos") and len(data["photos"]) > 0:
-                    # Return the medium-sized landscape image URL
-                    return data["photos"][0]["src"]["large"]
-            
-            return None
+            response = self.session.get(self.base_url, headers=headers, params=params, timeout=10)
         except Exception as e:
             print(f"Error fetching image for '{query}': {str(e)}")
-            return None
+            raise ImageFetchError(str(e)) from e
+        
+        if response.status_code != 200:
+            raise ImageFetchError(f"Pexels search returned HTTP {response.status_code}")
+        data = response.json()
+        image_url = None
+        if data.get("photos") and len(data["photos"]) > 0:
+            # Return the medium-sized landscape image URL
+            image_url = data["photos"][0]["src"]["large"]
+        if self.cache:
+            self.cache.set(cache_key, (image_url or "").encode("utf-8"))
+        return image_url
     
-    def download_image(self, image_url: str) -> Optional[bytes]:
+    def download_image(self, image_url: str, fit: Optional[ImageFit] = None) -> Optional[bytes]:
         """
-        Download image bytes from URL
+        Download image bytes from URL, normalized to `fit` if given
         Returns image bytes or None if failed
         """
         try:
-            response = requests.get(image_url, timeout=15)
-            if response.status_code == 200:
-                return response.content
+            return self._download_image(image_url, fit)
+        except ImageFetchError:
             return None
+    
+    def _download_image(self, image_url: str, fit: Optional[ImageFit] = None) -> Optional[bytes]:
+        # Only the normalized result is cached when a fit is requested, not the original
+        cache_key = f"image:{fit.key}:{image_url}" if fit else f"image:{image_url}"
+        cached = self._cached_image(cache_key)
+        if cached is not None:
+            return cached
+        
+        with self._inflight_lock:
+            pending = self._inflight.get(cache_key)
+            if pending is None:
+                future = self._inflight[cache_key] = Future()
+        if pending is not None:
+            return pending.result()
+        
+        try:
+            image_data = self._download(image_url, fit)
+            if image_data:
+                self._store_image(cache_key, image_data)
+        except Exception as e:
+            # Waiters for the same URL see the same failure
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+        future.set_result(image_data)
+        return image_data
+    
+    def _download(self, image_url: str, fit: Optional[ImageFit]) -> Optional[bytes]:
+        try:
+            response = self.session.get(image_url, timeout=15)
         except Exception as e:
             print(f"Error downloading image from {image_url}: {str(e)}")
+            raise ImageFetchError(str(e)) from e
+        if response.status_code != 200:
+            raise ImageFetchError(f"Image download returned HTTP {response.status_code}")
+        # An image that can't be decoded is skipped like a search with no results
+        return normalize_image(response.content, fit) if fit else response.content
+    
+    def _cached_image(self, cache_key: str) -> Optional[bytes]:
+        if not self.cache:
+            return None
+        if self.blobs is None:
+            return self.cache.get(cache_key)
+        digest = self.cache.get(f"blob:{cache_key}")
+        # A reference whose blob was evicted is just a miss
+        return self.blobs.get(digest.decode("ascii")) if digest else None
+    
+    def _store_image(self, cache_key: str, image_data: bytes):
+        if not self.cache:
+            return
+        if self.blobs is None:
+            self.cache.set(cache_key, image_data)
+            return
+        try:
+            digest = self.blobs.put(image_data)
+        except OSError as e:
+            print(f"Error storing image blob: {str(e)}")
+            return
+        self.cache.set(f"blob:{cache_key}", digest.encode("ascii"))
+    
+    def fetch_first(self, queries: List[str], fit: Optional[ImageFit] = None) -> Optional[bytes]:
+        """Try each query in turn and return the bytes of the first image found"""
+        try:
+            return self._fetch_first(queries, fit)
+        except ImageFetchError:
             return None
+    
+    def _fetch_first(self, queries: List[str], fit: Optional[ImageFit] = None) -> Optional[bytes]:
+        # Only report a failure if no query produced an image
+        error = None
+        for query in queries:
+            try:
+                image_url = self._search(query)
+                if image_url:
+                    image_data = self._download_image(image_url, fit)
+                    if image_data:
+                        return image_data
+            except ImageFetchError as e:
+                error = e
+        if error is not None:
+            raise error
+        return None
+    
+    def prefetch(self, queries_by_key: Dict[Hashable, List[str]], fit: Optional[ImageFit] = None) -> Dict[Hashable, Optional[bytes]]:
+        """
+        Resolve images for many slides concurrently, normalized to `fit` if given.
+        Takes {key: [query, fallback queries...]} and returns {key: bytes or None}.
+        Keys whose lookup failed (rather than found nothing) are left out.
+        """
+        if not queries_by_key:
+            return {}
+        if not self.pexels_api_key:
+            return {key: None for key in queries_by_key}
+        
+        max_workers = max(1, min(self.max_concurrency, len(queries_by_key)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image") as executor:
+            futures = {key: executor.submit(self._fetch_first, queries, fit) for key, queries in queries_by_key.items()}
+            images = {}
+            for key, future in futures.items():
+                try:
+                    images[key] = future.result()
+                except ImageFetchError:
+                    pass
+            return images
+
+def build_image_cache() -> Optional[SQLiteCache]:
+    if not settings.image_cache_path:
+        return None
+    return SQLiteCache(
+        settings.image_cache_path,
+        max_bytes=settings.image_cache_max_bytes,
+        ttl_seconds=settings.image_cache_ttl_seconds
+    )
+
+def build_image_blob_store() -> Optional[BlobStore]:
+    if not settings.image_blob_dir:
+        return None
+    return BlobStore(settings.image_blob_dir, max_bytes=settings.image_blob_max_bytes)
 
-image_service = ImageService()
+image_service = ImageService(cache=build_image_cache(), blobs=build_image_blob_store())
@@ -0,0 +1,73 @@
+"""
+Normalization of downloaded photos before they are embedded in a deck.
+
+Pexels "large" renditions are 1-3 MB, but a slide shows them in a few inches.
+normalize_image center-crops a photo to the placement box's aspect ratio,
+downsamples it to the box's size at the target DPI and re-encodes it as a
+progressive JPEG, which PowerPoint, LibreOffice and Keynote all embed natively.
+"""
+from dataclasses import dataclass
+from typing import Optional
+from PIL import Image, ImageOps
+import io
+
+@dataclass(frozen=True)
+class ImageFit:
+    """Pixel box an image is normalized to, plus the JPEG quality to encode it with"""
+    width_px: int
+    height_px: int
+    quality: int = 80
+    
+    @classmethod
+    def for_box(cls, width_in: float, height_in: float, dpi: int, quality: int = 80) -> "ImageFit":
+        return cls(round(width_in * dpi), round(height_in * dpi), quality)
+    
+    @property
+    def key(self) -> str:
+        """Short tag for cache keys; changes whenever the output would"""
+        return f"{self.width_px}x{self.height_px}q{self.quality}"
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    if image.mode == "RGB":
+        return image
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        # JPEG has no alpha: flatten onto the white slide background
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+def normalize_image(data: bytes, fit: ImageFit) -> Optional[bytes]:
+    """
+    Center-crop `data` to the aspect ratio of `fit`, shrink it to fit's size
+    (never enlarging it) and return it as JPEG. None if it can't be decoded.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            # Let the JPEG decoder skip detail we'd throw away anyway (DCT scaling)
+            source.draft("RGB", (fit.width_px, fit.height_px))
+            image = _to_rgb(ImageOps.exif_transpose(source))
+            
+            width, height = image.size
+            ratio = fit.width_px / fit.height_px
+            if width / height > ratio:
+                crop_width, crop_height = round(height * ratio), height
+            else:
+                crop_width, crop_height = width, round(width / ratio)
+            left, top = (width - crop_width) // 2, (height - crop_height) // 2
+            scale = min(1.0, fit.width_px / crop_width)
+            size = (round(crop_width * scale), round(crop_height * scale))
+            image = image.resize(
+                size,
+                Image.Resampling.LANCZOS,
+                box=(left, top, left + crop_width, top + crop_height),
+                reducing_gap=3.0
+            )
+            
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=fit.quality, optimize=True, progressive=True)
+            return output.getvalue()
+    except Exception as e:
+        print(f"Error normalizing image: {str(e)}")
+        return None
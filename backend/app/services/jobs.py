@@ -0,0 +1,226 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.database import AsyncSessionLocal
+from app.models import Project, DocumentType, GenerationJob, GenerationJobItem, JobStatus
+from app.services.llm import async_llm_service, LLMGenerationError
+from app.services.export_cache import invalidate_project_exports
+from app.services.section_writes import section_write_buffer
+from app.config import get_settings
+import asyncio
+
+settings = get_settings()
+
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+async def _active_job(db: AsyncSession, project_id: int) -> Optional[GenerationJob]:
+    result = await db.execute(
+        select(GenerationJob).options(selectinload(GenerationJob.items)).where(
+            GenerationJob.project_id == project_id,
+            GenerationJob.status.in_(ACTIVE_STATUSES)
+        ).execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def enqueue_generation_job(db: AsyncSession, project: Project) -> GenerationJob:
+    """
+    Queue generation of every empty section of a project.
+    Returns the project's already active job instead of queueing a second one;
+    the unique index on active jobs settles concurrent enqueues.
+    """
+    job = await _active_job(db, project.id)
+    if job:
+        return job
+    
+    project_id, user_id = project.id, project.user_id
+    section_ids = [section.id for section in project.sections if not section.content]
+    job = GenerationJob(
+        project_id=project_id,
+        user_id=user_id,
+        status=JobStatus.QUEUED if section_ids else JobStatus.COMPLETED,
+        total_sections=len(section_ids),
+        completed_sections=0,
+        finished_at=None if section_ids else datetime.utcnow(),
+        items=[GenerationJobItem(section_id=section_id, status=JobStatus.QUEUED) for section_id in section_ids]
+    )
+    db.add(job)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request queued one between the check and the insert
+        await db.rollback()
+        job = await _active_job(db, project_id)
+        if job is None:
+            raise
+        return job
+    return await get_job(db, job.id, user_id)
+
+async def get_job(db: AsyncSession, job_id: int, user_id: int) -> Optional[GenerationJob]:
+    result = await db.execute(
+        select(GenerationJob).options(selectinload(GenerationJob.items)).where(
+            GenerationJob.id == job_id,
+            GenerationJob.user_id == user_id
+        ).execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+class GenerationWorker:
+    """
+    Database-backed worker loop for generation jobs.
+    
+    Jobs are claimed with a conditional UPDATE and held under a lease that is
+    renewed while the job runs, so several processes can poll the same table
+    and a job whose worker died is picked up again once its lease expires.
+    Finished sections are recorded per item, so a resumed job only generates
+    what is still missing.
+    """
+    
+    def __init__(self, poll_interval: float = None, lease_seconds: int = None):
+        self.poll_interval = poll_interval or settings.job_poll_interval
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def run(self):
+        while True:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Generation worker error: {str(e)}")
+                processed = False
+            if not processed:
+                await asyncio.sleep(self.poll_interval)
+    
+    async def run_once(self) -> bool:
+        """Claim and process a single job. Returns False if nothing was claimable."""
+        job_id = await self._claim_next()
+        if job_id is None:
+            return False
+        await self._process(job_id)
+        return True
+    
+    def _claimable(self, now: datetime):
+        return or_(
+            GenerationJob.status == JobStatus.QUEUED,
+            and_(GenerationJob.status == JobStatus.RUNNING, GenerationJob.locked_until < now)
+        )
+    
+    async def _claim_next(self) -> Optional[int]:
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            result = await db.execute(
+                select(GenerationJob.id).where(self._claimable(now)).order_by(GenerationJob.created_at).limit(1)
+            )
+            job_id = result.scalar_one_or_none()
+            if job_id is None:
+                return None
+            
+            # Only one worker wins the conditional update
+            claimed = await db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id, self._claimable(now))
+                .values(status=JobStatus.RUNNING, locked_until=now + timedelta(seconds=self.lease_seconds))
+            )
+            await db.commit()
+            return job_id if claimed.rowcount == 1 else None
+    
+    async def _renew_lease(self, job_id: int):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(GenerationJob)
+                        .where(GenerationJob.id == job_id)
+                        .values(locked_until=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                    )
+                    await db.commit()
+            except Exception as e:
+                # A failed renewal must not end the heartbeat; the lease outlasts two more attempts
+                print(f"Generation job {job_id} lease renewal failed: {str(e)}")
+    
+    async def _process(self, job_id: int):
+        heartbeat = asyncio.create_task(self._renew_lease(job_id))
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(GenerationJob).options(
+                        selectinload(GenerationJob.items).selectinload(GenerationJobItem.section),
+                        selectinload(GenerationJob.project)
+                    ).where(GenerationJob.id == job_id)
+                )
+                job = result.scalar_one()
+                try:
+                    await self._generate(db, job)
+                    job.status = JobStatus.COMPLETED
+                except Exception as e:
+                    await db.rollback()
+                    job.status = JobStatus.FAILED
+                    job.error = str(e)
+                job.locked_until = None
+                job.finished_at = datetime.utcnow()
+                await db.commit()
+        finally:
+            heartbeat.cancel()
+    
+    async def _generate(self, db: AsyncSession, job: GenerationJob):
+        pending = {}
+        for item in job.items:
+            if item.status == JobStatus.COMPLETED:
+                continue
+            if item.section.content:
+                # Filled in since the job was queued (or before a restart); keep it
+                item.status = JobStatus.COMPLETED
+                job.completed_sections += 1
+            else:
+                item.status = JobStatus.RUNNING
+                pending[item.section_id] = item
+        await db.commit()
+        
+        project = job.project
+        doc_type = "docx" if project.document_type == DocumentType.DOCX else "pptx"
+        results = async_llm_service.generate_sections(
+            sections=[(item.section_id, item.section.title) for item in pending.values()],
+            main_topic=project.main_topic,
+            document_type=doc_type,
+            user_id=job.user_id
+        )
+        try:
+            async for section_id, content in results:
+                item = pending[section_id]
+                # Buffered autosaves go first, so they can't land on top of the generated text later
+                if section_write_buffer.needs_flush(section_id=section_id):
+                    await asyncio.to_thread(section_write_buffer.flush_section, section_id)
+                item.section.content = content
+                item.status = JobStatus.COMPLETED
+                job.completed_sections += 1
+                await db.commit()
+        except LLMGenerationError as e:
+            # Record which sections failed; the job fails and can be queued again for just those
+            for section_id in e.section_ids:
+                pending[section_id].status = JobStatus.FAILED
+                pending[section_id].error = str(e.cause)
+            await db.commit()
+            raise
+        finally:
+            if pending:
+                invalidate_project_exports(project.id)
+
+generation_worker = GenerationWorker()
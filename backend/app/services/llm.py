@@ -1,89 +1,435 @@
-from groq import Groq
+from groq import AsyncGroq, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from app.config import get_settings
-from typing import List
+from app.services.cache import Cache, MemoryLRUCache, SQLiteCache, TieredCache, content_key
+from app.services import prompts
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import random
+import re
+import time
 
 settings = get_settings()
 
-class LLMService:
-    def __init__(self):
-        self.client = Groq(api_key=settings.groq_api_key)
-        # llama-3.3-70b-versatile is the latest and most capable model on Groq
-        # Alternative: mixtral-8x7b-32768 for longer context
-        self.model = "llama-3.3-70b-versatile"
-    
-    def generate_content(self, section_title: str, main_topic: str, document_type: str) -> str:
-        """Generate content for a specific section/slide"""
-        if document_type == "docx":
-            prompt = f"""You are a senior business consultant and expert writer with 15+ years of experience creating high-impact business documents for Fortune 500 companies.
-
-CONTEXT:
-Main Topic: {main_topic}
-Section Focus: "{section_title}"
-
-YOUR TASK:
-Write authoritative, data-informed content for this section that demonstrates deep subject matter expertise.
+# Bullet markers the model sometimes adds despite being told not to
+_BULLET_PREFIX = re.compile(r"^(?:[•*]|-\s)\s*")
 
-CONTENT REQUIREMENTS:
-1. LENGTH: 300-500 words (substantive, not filler)
-2. STRUCTURE:
-   - Opening statement that hooks with insight or data point
-   - 2-3 well-developed paragraphs with concrete examples
-   - Practical implications or actionable takeaways
-3. QUALITY STANDARDS:
-   - Include specific metrics, frameworks, or methodologies where relevant
-   - Reference industry best practices or proven approaches
-   - Use precise business terminology (avoid vague generalities)
-   - Provide actionable insights, not just descriptions
-   - Support claims with logical reasoning or implied expertise
-4. TONE: Professional, authoritative, strategic (Forbes/HBR caliber)
+class LLMUnavailableError(Exception):
+    """An LLM call failed for good (non-retryable error, or retries exhausted)"""
 
-AVOID:
-- Generic statements like "This is important because..."
-- Obvious advice or platitudes
-- Repetitive phrasing
-- Filler words and fluff
-
-Deliver ONLY the section content - no meta-commentary, no section title repetition."""
-        else:  # pptx
-            prompt = f"""You are a senior strategy consultant creating a C-suite presentation for a Fortune 500 company.
-
-CONTEXT:
-Presentation Topic: {main_topic}
-Current Slide: "{section_title}"
-
-YOUR TASK:
-Create punchy, executive-level bullet points that deliver maximum insight with minimum words.
-
-STRICT FORMATTING RULES:
-- Output EXACTLY 4-6 bullet points
-- Each bullet MUST start with "• " (bullet symbol + space)
-- Length: 8-15 words per bullet (concise and impactful)
-- NO paragraphs, NO numbered lists, NO extra text
-
-CONTENT QUALITY STANDARDS:
-- Lead with strong action verbs or specific metrics
-- Use precise business language (KPIs, ROI, scalability, etc.)
-- Include concrete elements: numbers, percentages, frameworks, or outcomes
-- Focus on strategic insights, not generic observations
-- Make each bullet deliver distinct value (no redundancy)
+class LLMGenerationError(Exception):
+    """Some sections of a generate_sections batch could not be generated"""
+    
+    def __init__(self, section_ids: List[int], cause: Optional[Exception] = None):
+        super().__init__(f"Failed to generate {len(section_ids)} section(s): {cause}")
+        self.section_ids = section_ids
+        self.cause = cause
 
-EXAMPLES OF EXCELLENT BULLETS:
-• Implement AI-driven analytics to reduce operational costs by 30%
-• Leverage agile methodology for faster time-to-market execution
-• Establish cross-functional teams to drive innovation initiatives
-• Deploy predictive modeling to optimize resource allocation
-• Scale infrastructure using cloud-native architecture patterns
+def estimate_request_tokens(prompt: str, max_tokens: int) -> int:
+    """Tokens to reserve for a call: estimated prompt size plus the completion budget"""
+    return prompts.estimate_tokens(prompt) + max_tokens
 
-AVOID:
-- Vague statements ("Improve efficiency", "Enhance performance")
-- Obvious points ("This is important", "We should focus on")
-- Repetitive phrasing across bullets
-- Starting every bullet the same way
+class TokenBucket:
+    """Continuously refilling bucket holding at most `per_minute` units"""
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units (or, for a tiny bucket, a full one) are available"""
+        self._refill(now)
+        # Going into debt for the rest keeps the average rate exact
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+    
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+    
+    def adjust(self, amount: float):
+        """Give back (or, if negative, take) units once the real cost is known"""
+        self.level = min(self.capacity, self.level + amount)
+
+@dataclass
+class _Ticket:
+    user_key: Any
+    tokens: int
+    future: asyncio.Future
+    enqueued_at: float
+
+class LLMScheduler:
+    """
+    Central admission control for Groq calls.
+    
+    Calls wait in per-user FIFO queues and are granted round-robin across
+    users, so one large deck cannot starve other users. A call is granted when
+    a request and its estimated tokens are available in the per-minute token
+    buckets and fewer than max_in_flight calls are running; the token estimate
+    is corrected with the real usage afterwards. Rate-limit responses pause
+    all grants for their retry-after, and retryable failures are retried with
+    jittered exponential backoff.
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_in_flight: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.granted = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reset()
+    
+    def _reset(self):
+        self._requests = TokenBucket(self.requests_per_minute)
+        self._tokens = TokenBucket(self.tokens_per_minute)
+        self._queues: Dict[Any, Deque[_Ticket]] = {}
+        self._turns: Deque[Any] = deque()  # Users with queued calls, in round-robin order
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+    
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (e.g. a restarted worker): start from a clean state
+            self._loop = loop
+            self._reset()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+    
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            delay = self._grant_ready()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _grant_ready(self) -> Optional[float]:
+        """Grant every call that can run now. Returns how long to wait before trying again (None: until woken)."""
+        while self._turns:
+            if self._in_flight >= self.max_in_flight:
+                return None
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            user_key = self._turns[0]
+            queue = self._queues[user_key]
+            ticket = queue[0]
+            if not ticket.future.cancelled():
+                wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(ticket.tokens, now))
+                if wait > 0:
+                    return wait
+                self._requests.consume(1, now)
+                self._tokens.consume(ticket.tokens, now)
+                self._in_flight += 1
+                self.granted += 1
+                self._waits.append(now - ticket.enqueued_at)
+                ticket.future.set_result(None)
+            queue.popleft()
+            # Next user's turn; drop users whose queue is now empty
+            self._turns.popleft()
+            if queue:
+                self._turns.append(user_key)
+            else:
+                del self._queues[user_key]
+        return None
+    
+    async def _acquire(self, user_key: Any, tokens: int) -> int:
+        self._ensure_dispatcher()
+        # A single call can never need more than a full bucket
+        tokens = min(int(tokens), int(self._tokens.capacity))
+        ticket = _Ticket(user_key, tokens, asyncio.get_running_loop().create_future(), time.monotonic())
+        queue = self._queues.get(user_key)
+        if queue is None:
+            queue = self._queues[user_key] = deque()
+            self._turns.append(user_key)
+        queue.append(ticket)
+        self._wakeup.set()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Granted just as the caller was cancelled: hand the slot back
+                self._release(tokens, 0)
+            else:
+                ticket.future.cancel()
+                self._wakeup.set()
+            raise
+        return tokens
+    
+    def _release(self, reserved: int, used: Optional[int]):
+        self._in_flight -= 1
+        if used is not None:
+            self._tokens.adjust(reserved - used)
+        self._wakeup.set()
+    
+    @asynccontextmanager
+    async def slot(self, user_key: Any, tokens: int):
+        """
+        Hold one admitted call for the duration of the block. Set usage["tokens"]
+        to the call's real total token count if it is known.
+        """
+        reserved = await self._acquire(user_key, tokens)
+        usage: Dict[str, Optional[int]] = {"tokens": None}
+        try:
+            yield usage
+        finally:
+            self._release(reserved, usage["tokens"])
+    
+    def retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after `error`, or None if the call should fail"""
+        if attempt >= self.max_retries:
+            self.failures += 1
+            return None
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        # Equal jitter: keep half the backoff, randomize the rest so retries don't synchronize
+        delay = backoff / 2 + random.uniform(0, backoff / 2)
+        if isinstance(error, RateLimitError):
+            self.rate_limited += 1
+            retry_after = _retry_after_seconds(error)
+            if retry_after is not None:
+                delay = retry_after + random.uniform(0, self.backoff_base)
+            # Groq limits apply to the whole API key: hold back every caller, not just this one
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        elif not isinstance(error, (APIConnectionError, APITimeoutError, InternalServerError)):
+            self.failures += 1
+            return None
+        self.retries += 1
+        return delay
+    
+    async def call(self, user_key: Any, tokens: int, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Run request() under the scheduler, retrying transient failures"""
+        attempt = 0
+        while True:
+            async with self.slot(user_key, tokens) as usage:
+                try:
+                    response = await request()
+                except Exception as e:
+                    error = e
+                else:
+                    usage["tokens"] = getattr(getattr(response, "usage", None), "total_tokens", None)
+                    return response
+            delay = self.retry_delay(error, attempt)
+            if delay is None:
+                raise LLMUnavailableError(str(error)) from error
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "queue_depth": sum(len(queue) for queue in self._queues.values()),
+            "queued_users": len(self._queues),
+            "in_flight": self._in_flight,
+            "granted": self.granted,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "paused_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+            "wait_seconds_avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+            "wait_seconds_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else 0.0,
+            "wait_seconds_max": round(waits[-1], 4) if waits else 0.0,
+            "request_bucket": round(self._requests.level, 2),
+            "token_bucket": round(self._tokens.level, 2),
+        }
+
+def _retry_after_seconds(error: RateLimitError) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue
+    return None
 
-Deliver ONLY the bullet points in the exact format shown - nothing else."""
-        
+class BaseLLMService:
+    """Prompt building, response caching and parsing, independent of the Groq client"""
+    
+    def __init__(self, cache: Optional[Cache] = None):
+        # llama-3.3-70b-versatile is the latest and most capable model on Groq
+        # Alternative: mixtral-8x7b-32768 for longer context
+        self.model = "llama-3.3-70b-versatile"
+        self.cache = cache
+    
+    def _cache_key(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        return content_key("chat.completions", self.model, prompt, temperature, max_tokens)
+    
+    async def _cached(self, key: str) -> Optional[str]:
+        # The disk tier is SQLite; its *_async methods keep that I/O off the event loop
+        if self.cache is None:
+            return None
+        value = await self.cache.get_async(key)
+        return value.decode("utf-8") if value is not None else None
+    
+    async def _store(self, key: str, content: str):
+        if self.cache is not None:
+            await self.cache.set_async(key, content.encode("utf-8"))
+    
+    def _generate_prompt(self, section_title: str, main_topic: str, document_type: str) -> str:
+        """Build the prompt for a section/slide"""
+        template = prompts.GENERATE_DOCX if document_type == "docx" else prompts.GENERATE_PPTX
+        return template.render(section_title=section_title, main_topic=main_topic)
+    
+    def _refine_prompt(self, current_content: str, refinement_prompt: str, section_title: str, document_type: str) -> str:
+        """Build the prompt for refining existing content"""
+        template = prompts.REFINE_PPTX if document_type == "pptx" else prompts.REFINE_DOCX
+        return template.render(
+            current_content=current_content,
+            refinement_prompt=refinement_prompt,
+            section_title=section_title
+        )
+    
+    def _outline_prompt(self, main_topic: str, document_type: str, num_items: Optional[int]) -> str:
+        """Build the prompt for outline/slide title suggestions"""
+        if document_type == "docx":
+            return prompts.OUTLINE_DOCX.render(main_topic=main_topic)
+        return prompts.OUTLINE_PPTX.render(main_topic=main_topic, num_slides=num_items or 8)
+    
+    @staticmethod
+    def _content_task(document_type: str) -> str:
+        """Task name usage is recorded under: docx sections are prose, slides are bullets"""
+        return "prose" if document_type == "docx" else "bullets"
+    
+    @staticmethod
+    def _generate_max_tokens(document_type: str) -> int:
+        return prompts.prose_budget() if document_type == "docx" else prompts.bullets_budget()
+    
+    @staticmethod
+    def _refine_max_tokens(current_content: str, document_type: str) -> int:
+        return prompts.refine_budget(document_type, current_content)
+    
+    @staticmethod
+    def _outline_max_tokens(document_type: str, num_items: Optional[int]) -> int:
+        # The docx prompt asks for 6-8 titles
+        return prompts.outline_budget(8 if document_type == "docx" else num_items or 8)
+    
+    @staticmethod
+    def _parse_outline(content: str) -> List[str]:
+        # Split by lines and clean up
+        return [line.strip() for line in content.strip().split('\n') if line.strip()]
+    
+    def _deck_prompt(self, main_topic: str, slide_titles: Sequence[str]) -> str:
+        """Build the prompt asking for every slide of a deck as one JSON object"""
+        slides = "\n".join(f"{index}. {title}" for index, title in enumerate(slide_titles, start=1))
+        return prompts.DECK.render(main_topic=main_topic, slides=slides)
+    
+    @staticmethod
+    def _deck_max_tokens(slide_count: int) -> int:
+        return min(8192, prompts.deck_budget(slide_count))
+    
+    @staticmethod
+    def _record_usage(task: str, response: Any, max_tokens: int):
+        usage = getattr(response, "usage", None)
+        choices = getattr(response, "choices", None)
+        prompts.token_usage.record(
+            task,
+            getattr(usage, "completion_tokens", None),
+            max_tokens,
+            choices[0].finish_reason if choices else None
+        )
+    
+    @staticmethod
+    def _parse_deck(content: str, slide_count: int) -> Dict[int, str]:
+        """
+        Validate a deck response and return {slide_index (0-based): bullet text}
+        for every slide that came back well formed. Missing or malformed slides
+        are left out so the caller can regenerate just those.
+        """
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        if not match:
+            return {}
         try:
-            response = self.client.chat.completions.create(
+            slides = json.loads(match.group(0)).get("slides")
+        except (ValueError, AttributeError):
+            return {}
+        if not isinstance(slides, list):
+            return {}
+        
+        parsed = {}
+        for position, slide in enumerate(slides):
+            if not isinstance(slide, dict):
+                continue
+            index = slide.get("index", position + 1)
+            bullets = slide.get("bullets")
+            if not isinstance(index, int) or not 1 <= index <= slide_count or not isinstance(bullets, list):
+                continue
+            bullets = [_BULLET_PREFIX.sub("", bullet.strip()) for bullet in bullets if isinstance(bullet, str)]
+            bullets = [bullet for bullet in bullets if bullet]
+            if 3 <= len(bullets) <= 8:
+                parsed[index - 1] = "\n".join(f"• {bullet}" for bullet in bullets)
+        return parsed
+    
+    async def _deck_result(self, cache_key: str, content: Optional[str], slide_count: int, error: Optional[Exception] = None) -> Dict[int, str]:
+        """Slides parsed from a deck completion; empty (so every slide goes per-slide) if the call failed"""
+        if content is None:
+            print(f"Deck generation failed, falling back to per-slide calls: {str(error)}")
+            return {}
+        slides = self._parse_deck(content, slide_count)
+        if len(slides) == slide_count:
+            # Only cache complete decks; partial ones are retried per slide
+            await self._store(cache_key, content)
+        return slides
+    
+    @staticmethod
+    def _deck_chunks(sections: Sequence[Tuple[int, str]]) -> List[Sequence[Tuple[int, str]]]:
+        size = max(1, settings.llm_deck_max_slides)
+        return [sections[start:start + size] for start in range(0, len(sections), size)]
+    
+    @staticmethod
+    def _use_deck_mode(sections: Sequence[Tuple[int, str]], document_type: str) -> bool:
+        return settings.llm_deck_mode and document_type == "pptx" and len(sections) > 1
+
+class AsyncLLMService(BaseLLMService):
+    """
+    Section generation, refinement and outlines on the async Groq client.
+    Every call is admitted by the shared LLMScheduler; pass user_id so calls are
+    queued fairly per user. Failures raise LLMUnavailableError instead of
+    returning error text.
+    """
+    
+    def __init__(self, scheduler: "LLMScheduler", cache: Optional[Cache] = None):
+        super().__init__(cache)
+        # The scheduler owns retries (and honors retry-after), so the client must not retry on its own
+        self.client = AsyncGroq(api_key=settings.groq_api_key, base_url=settings.groq_base_url, max_retries=0)
+        self.scheduler = scheduler
+    
+    async def _complete(self, task: str, prompt: str, temperature: float, max_tokens: int, user_id: Optional[int], **options) -> str:
+        response = await self.scheduler.call(
+            user_id,
+            estimate_request_tokens(prompt, max_tokens),
+            lambda: self.client.chat.completions.create(
                 messages=[
                     {
                         "role": "user",
@@ -91,157 +437,222 @@ Deliver ONLY the bullet points in the exact format shown - nothing else."""
                     }
                 ],
                 model=self.model,
-                temperature=0.6,  # Lower for more focused, professional output
-                max_tokens=1024
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **options
             )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            return f"Error generating content: {str(e)}"
+        )
+        self._record_usage(task, response, max_tokens)
+        return response.choices[0].message.content.strip()
     
-    def refine_content(self, current_content: str, refinement_prompt: str, section_title: str, document_type: str = "pptx") -> str:
-        """Refine existing content based on user prompt"""
-        if document_type == "pptx":
-            prompt = f"""You are a senior presentation coach refining executive-level slides.
-
-CURRENT SLIDE: "{section_title}"
-
-EXISTING BULLETS:
-{current_content}
-
-USER'S REFINEMENT REQUEST:
-{refinement_prompt}
-
-YOUR TASK:
-Revise the bullet points to address the user's request while maintaining C-suite quality.
-
-STRICT FORMATTING RULES:
-- Return EXACTLY 4-6 bullet points
-- Each bullet MUST start with "• " (bullet symbol + space)
-- Length: 8-15 words per bullet
-- NO paragraphs, NO numbered lists, NO meta-commentary
-
-QUALITY STANDARDS:
-- Keep the strategic, executive tone
-- Use precise business terminology and metrics where relevant
-- Ensure bullets are distinct and non-redundant
-- Lead with action verbs or concrete elements
-- Incorporate the user's feedback while maintaining professionalism
-
-Deliver ONLY the revised bullet points - nothing else."""
-        else:
-            prompt = f"""You are a senior business consultant refining document content for executive review.
-
-SECTION: "{section_title}"
-
-CURRENT CONTENT:
-{current_content}
-
-USER'S REFINEMENT REQUEST:
-{refinement_prompt}
-
-YOUR TASK:
-Revise the content to address the user's feedback while maintaining high professional standards.
-
-REQUIREMENTS:
-- Incorporate the user's specific requests/changes
-- Maintain authoritative, strategic tone
-- Keep concrete examples, metrics, and frameworks
-- Ensure logical flow and coherence
-- Preserve word count (300-500 words) and paragraph structure
-- Use precise business language
-
-Deliver ONLY the refined content - no explanations or meta-commentary."""
+    async def generate_content(self, section_title: str, main_topic: str, document_type: str, user_id: Optional[int] = None) -> str:
+        """Generate content for a specific section/slide"""
+        prompt = self._generate_prompt(section_title, main_topic, document_type)
+        temperature = 0.6  # Lower for more focused, professional output
+        max_tokens = self._generate_max_tokens(document_type)
+        cache_key = self._cache_key(prompt, temperature, max_tokens)
+        cached = await self._cached(cache_key)
+        if cached is not None:
+            return cached
+        
+        content = await self._complete(self._content_task(document_type), prompt, temperature, max_tokens, user_id)
+        await self._store(cache_key, content)
+        return content
+    
+    async def generate_sections(
+        self,
+        sections: Sequence[Tuple[int, str]],
+        main_topic: str,
+        document_type: str,
+        max_concurrency: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Generate content for many sections concurrently, at most max_concurrency
+        in flight. Yields (section_id, content) in completion order. pptx decks
+        go through generate_deck first (deck mode); only slides it could not
+        produce are generated one by one.
+        
+        Sections that still fail after the scheduler's retries are not yielded;
+        once everything else is done LLMGenerationError lists them.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or settings.llm_max_concurrency))
         
+        async def run(section_id: int, title: str) -> Tuple[int, str]:
+            async with semaphore:
+                return section_id, await self.generate_content(title, main_topic, document_type, user_id=user_id)
+        
+        if self._use_deck_mode(sections, document_type):
+            # Whole chunks of the deck in one call each; only slides that fail to parse go per-slide
+            async def run_deck(chunk: Sequence[Tuple[int, str]]) -> Tuple[Sequence[Tuple[int, str]], Dict[int, str]]:
+                async with semaphore:
+                    return chunk, await self.generate_deck([title for _, title in chunk], main_topic, user_id=user_id)
+            
+            missing = []
+            for chunk, slides in await asyncio.gather(*(run_deck(chunk) for chunk in self._deck_chunks(sections))):
+                for index, (section_id, title) in enumerate(chunk):
+                    if index in slides:
+                        yield section_id, slides[index]
+                    else:
+                        missing.append((section_id, title))
+            sections = missing
+        
+        tasks = {asyncio.create_task(run(section_id, title)): section_id for section_id, title in sections}
+        failed, last_error = [], None
         try:
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=0.6,  # Lower for more controlled refinement
-                max_tokens=1024
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            return f"Error refining content: {str(e)}"
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    yield await next_done
+                except LLMUnavailableError as e:
+                    last_error = e
+            failed = [section_id for task, section_id in tasks.items() if task.done() and not task.cancelled() and task.exception()]
+        finally:
+            # Don't leave calls running if the consumer stops early
+            for task in tasks:
+                task.cancel()
+        if failed:
+            raise LLMGenerationError(failed, last_error)
     
-    def suggest_outline(self, main_topic: str, document_type: str, num_items: int = None) -> List[str]:
-        """Generate suggested section titles or slide titles"""
-        if document_type == "docx":
-            prompt = f"""You are a senior business consultant structuring a high-impact document.
-
-TOPIC: {main_topic}
-
-YOUR TASK:
-Create a logical, comprehensive document outline with 6-8 section titles that would impress executive stakeholders.
-
-REQUIREMENTS:
-- Start with an executive summary or introduction section
-- Build a logical narrative flow (context → analysis → strategy → action)
-- Use clear, professional section titles (not vague)
-- Each title should indicate specific value/content
-- End with conclusions, recommendations, or next steps
-- Avoid generic titles like "Overview" or "Background"
-
-EXAMPLE QUALITY:
-Instead of: "Introduction"
-Use: "Market Landscape and Strategic Imperatives"
-
-Instead of: "Analysis"
-Use: "Competitive Positioning and Gap Analysis"
-
-Provide ONLY the section titles, one per line, no numbering, no bullets, no extra text."""
-        else:  # pptx
-            num_slides = num_items or 8
-            prompt = f"""You are a senior strategy consultant creating a presentation outline for C-suite executives.
-
-TOPIC: {main_topic}
-
-YOUR TASK:
-Create exactly {num_slides} impactful slide titles that tell a clear, compelling story.
-
-SLIDE STRUCTURE:
-1. Title slide with hook (not just topic name)
-2-3. Context/problem definition slides
-4-6. Core analysis/strategy slides
-7. Conclusions or recommendations
-8. Next steps or call-to-action
-
-TITLE QUALITY STANDARDS:
-- Each title: 3-7 words, punchy and specific
-- Use action-oriented or insight-driven language
-- Avoid generic labels ("Introduction", "Overview", "Background")
-- Create narrative flow (each slide builds on previous)
-- Make titles executive-friendly (strategic, not tactical)
-
-EXAMPLES OF STRONG TITLES:
-- "Market Disruption: AI's $2T Opportunity"
-- "Three Critical Capability Gaps"
-- "Strategic Roadmap: 18-Month Timeline"
-- "ROI Projections and Success Metrics"
-
-Provide ONLY the slide titles, one per line, no numbering, no bullets, no extra commentary."""
+    async def generate_deck(self, slide_titles: Sequence[str], main_topic: str, user_id: Optional[int] = None) -> Dict[int, str]:
+        """
+        Generate bullets for all slides of a deck in one JSON-mode call.
+        Returns {slide_index: content} for the slides that parsed; empty on failure.
+        """
+        prompt = self._deck_prompt(main_topic, slide_titles)
+        temperature = 0.6
+        max_tokens = self._deck_max_tokens(len(slide_titles))
+        cache_key = self._cache_key(prompt, temperature, max_tokens)
+        cached = await self._cached(cache_key)
+        if cached is not None:
+            return self._parse_deck(cached, len(slide_titles))
         
         try:
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=0.7,  # Slightly higher for creative title generation
-                max_tokens=512
+            content = await self._complete(
+                "deck", prompt, temperature, max_tokens, user_id, response_format={"type": "json_object"}
             )
-            content = response.choices[0].message.content.strip()
-            # Split by lines and clean up
-            titles = [line.strip() for line in content.split('\n') if line.strip()]
-            return titles
-        except Exception as e:
-            return [f"Error generating outline: {str(e)}"]
-
-llm_service = LLMService()
+        except LLMUnavailableError as e:
+            return await self._deck_result(cache_key, None, len(slide_titles), e)
+        return await self._deck_result(cache_key, content, len(slide_titles))
+    
+    async def refine_content(
+        self,
+        current_content: str,
+        refinement_prompt: str,
+        section_title: str,
+        document_type: str = "pptx",
+        user_id: Optional[int] = None
+    ) -> str:
+        """Refine existing content based on user prompt"""
+        prompt = self._refine_prompt(current_content, refinement_prompt, section_title, document_type)
+        max_tokens = self._refine_max_tokens(current_content, document_type)
+        return await self._complete("refine", prompt, 0.6, max_tokens, user_id)
+    
+    async def stream_generate_content(
+        self,
+        section_title: str,
+        main_topic: str,
+        document_type: str,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Stream content for a section/slide as text deltas. Errors propagate to the caller."""
+        prompt = self._generate_prompt(section_title, main_topic, document_type)
+        max_tokens = self._generate_max_tokens(document_type)
+        async for delta in self._stream(self._content_task(document_type), prompt, 0.6, max_tokens, user_id):
+            yield delta
+    
+    async def stream_refine_content(
+        self,
+        current_content: str,
+        refinement_prompt: str,
+        section_title: str,
+        document_type: str = "pptx",
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Stream refined content as text deltas. Errors propagate to the caller."""
+        prompt = self._refine_prompt(current_content, refinement_prompt, section_title, document_type)
+        max_tokens = self._refine_max_tokens(current_content, document_type)
+        async for delta in self._stream("refine", prompt, 0.6, max_tokens, user_id):
+            yield delta
+    
+    async def _stream(self, task: str, prompt: str, temperature: float, max_tokens: int, user_id: Optional[int]) -> AsyncIterator[str]:
+        # Retries cover opening the stream; the scheduler slot is held until it is fully read
+        attempt = 0
+        while True:
+            async with self.scheduler.slot(user_id, estimate_request_tokens(prompt, max_tokens)) as usage:
+                try:
+                    stream = await self.client.chat.completions.create(
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        model=self.model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True
+                    )
+                except Exception as e:
+                    error = e
+                else:
+                    stream_usage, finish_reason = None, None
+                    async for chunk in stream:
+                        # Groq reports usage on the final chunk (x_groq.usage on older API versions)
+                        stream_usage = chunk.usage or getattr(chunk.x_groq, "usage", None) or stream_usage
+                        if chunk.choices:
+                            finish_reason = chunk.choices[0].finish_reason or finish_reason
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                yield delta
+                    if stream_usage is not None:
+                        usage["tokens"] = stream_usage.total_tokens
+                    prompts.token_usage.record(
+                        task, getattr(stream_usage, "completion_tokens", None), max_tokens, finish_reason
+                    )
+                    return
+            delay = self.scheduler.retry_delay(error, attempt)
+            if delay is None:
+                raise LLMUnavailableError(str(error)) from error
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    async def suggest_outline(self, main_topic: str, document_type: str, num_items: int = None, user_id: Optional[int] = None) -> List[str]:
+        """Generate suggested section titles or slide titles"""
+        prompt = self._outline_prompt(main_topic, document_type, num_items)
+        temperature = 0.7  # Slightly higher for creative title generation
+        max_tokens = self._outline_max_tokens(document_type, num_items)
+        cache_key = self._cache_key(prompt, temperature, max_tokens)
+        cached = await self._cached(cache_key)
+        if cached is not None:
+            return self._parse_outline(cached)
+        
+        content = await self._complete("outline", prompt, temperature, max_tokens, user_id)
+        await self._store(cache_key, content)
+        return self._parse_outline(content)
+
+def build_response_cache() -> Optional[TieredCache]:
+    """In-memory LRU backed by a SQLite file, shared by both services"""
+    if not settings.llm_cache_enabled:
+        return None
+    memory = MemoryLRUCache(
+        max_entries=settings.llm_cache_memory_entries,
+        ttl_seconds=settings.llm_cache_ttl_seconds
+    )
+    disk = SQLiteCache(
+        settings.llm_cache_path,
+        max_bytes=settings.llm_cache_max_bytes,
+        ttl_seconds=settings.llm_cache_ttl_seconds
+    ) if settings.llm_cache_path else None
+    return TieredCache(memory, disk)
+
+llm_response_cache = build_response_cache()
+# The buckets are per process, so each one gets its share of the plan's limits
+llm_scheduler = LLMScheduler(
+    requests_per_minute=settings.llm_requests_per_minute / settings.llm_process_count,
+    tokens_per_minute=settings.llm_tokens_per_minute / settings.llm_process_count,
+    max_in_flight=settings.llm_max_in_flight,
+    max_retries=settings.llm_max_retries,
+    backoff_base=settings.llm_backoff_base_seconds,
+    backoff_max=settings.llm_backoff_max_seconds
+)
+async_llm_service = AsyncLLMService(llm_scheduler, cache=llm_response_cache)
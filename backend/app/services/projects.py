@@ -0,0 +1,136 @@
+"""
+Project/section queries with explicit loading strategies.
+
+Every lookup is scoped to the owning user and loads exactly the relationships
+its callers serialize, so an endpoint costs a fixed number of round trips
+however many sections a project has:
+
+- project + ordered sections: 2 queries (project row, then one IN query for sections)
+- section + its project: 1 query (joined)
+- a page of the project list: 1 query (+1 aggregate when section counts are requested)
+
+Project and section lookups first write out any autosaves still held in the
+section write-behind buffer for them, so callers always see the latest content.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.models import Project, Section
+from app.services.section_writes import section_write_buffer
+import asyncio
+import base64
+import json
+
+TOPIC_PREVIEW_CHARS = 200
+
+def _project_query(project_id: int, user_id: int, with_sections: bool):
+    query = select(Project).where(
+        Project.id == project_id,
+        Project.user_id == user_id
+    )
+    if with_sections:
+        query = query.options(selectinload(Project.sections))
+    return query
+
+def _section_query(section_id: int, user_id: int):
+    return select(Section).join(Project).options(
+        joinedload(Section.project)
+    ).where(
+        Section.id == section_id,
+        Project.user_id == user_id
+    )
+
+def get_user_project(db: Session, project_id: int, user_id: int, with_sections: bool = True) -> Optional[Project]:
+    section_write_buffer.flush_project(project_id)
+    query = _project_query(project_id, user_id, with_sections).execution_options(populate_existing=True)
+    return db.execute(query).scalar_one_or_none()
+
+def get_user_section(db: Session, section_id: int, user_id: int, flush_pending: bool = True) -> Optional[Section]:
+    if flush_pending:
+        section_write_buffer.flush_section(section_id)
+    return db.execute(_section_query(section_id, user_id)).scalar_one_or_none()
+
+async def get_user_project_async(db: AsyncSession, project_id: int, user_id: int, with_sections: bool = True) -> Optional[Project]:
+    if section_write_buffer.needs_flush(project_id=project_id):
+        await asyncio.to_thread(section_write_buffer.flush_project, project_id)
+    query = _project_query(project_id, user_id, with_sections).execution_options(populate_existing=True)
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+async def get_user_section_async(db: AsyncSession, section_id: int, user_id: int) -> Optional[Section]:
+    if section_write_buffer.needs_flush(section_id=section_id):
+        await asyncio.to_thread(section_write_buffer.flush_section, section_id)
+    result = await db.execute(_section_query(section_id, user_id))
+    return result.scalar_one_or_none()
+
+def encode_cursor(updated_at: datetime, project_id: int) -> str:
+    payload = json.dumps([updated_at.isoformat(), project_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, project_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(updated_at), int(project_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def list_user_projects(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    with_section_counts: bool = False
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of a user's projects, newest first, keyed on (updated_at, id) so
+    deep pages cost the same as the first one (served by ix_projects_user_id_updated_at).
+    Only the listed columns are read, and main_topic is cut down in the database.
+    Returns the rows and the cursor for the next page (None on the last page).
+    """
+    query = select(
+        Project.id,
+        Project.title,
+        Project.document_type,
+        func.substr(Project.main_topic, 1, TOPIC_PREVIEW_CHARS + 1).label("topic_preview"),
+        Project.created_at,
+        Project.updated_at
+    ).where(Project.user_id == user_id)
+    if cursor:
+        updated_at, project_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Project.updated_at < updated_at,
+            and_(Project.updated_at == updated_at, Project.id < project_id)
+        ))
+    # Fetch one extra row to learn whether another page exists
+    query = query.order_by(Project.updated_at.desc(), Project.id.desc()).limit(limit + 1)
+    rows = [dict(row._mapping) for row in db.execute(query)]
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["updated_at"], rows[-1]["id"])
+    
+    for row in rows:
+        if len(row["topic_preview"]) > TOPIC_PREVIEW_CHARS:
+            row["topic_preview"] = row["topic_preview"][:TOPIC_PREVIEW_CHARS].rstrip() + "…"
+    
+    if with_section_counts:
+        counts = count_sections(db, [row["id"] for row in rows])
+        for row in rows:
+            row["section_count"] = counts.get(row["id"], 0)
+    return rows, next_cursor
+
+def count_sections(db: Session, project_ids: List[int]) -> Dict[int, int]:
+    """Section counts for many projects in a single GROUP BY query"""
+    if not project_ids:
+        return {}
+    result = db.execute(
+        select(Section.project_id, func.count(Section.id))
+        .where(Section.project_id.in_(project_ids))
+        .group_by(Section.project_id)
+    )
+    return {project_id: count for project_id, count in result}
@@ -0,0 +1,302 @@
+"""
+Prompt templates, token estimates and per-task output budgets for the LLM services.
+
+Templates are parsed once at import; rendering only joins the literal parts
+with the values. Output budgets are derived from the format each prompt asks
+for (bullet count x words per bullet, word ranges for prose, ...) instead of a
+flat max_tokens, and TokenUsage records what each task really produced so
+the budgets can be tuned from data.
+"""
+from collections import deque
+from string import Formatter
+from typing import Deque, Dict, List, Optional, Tuple
+from app.config import get_settings
+import math
+import re
+import threading
+
+settings = get_settings()
+
+# English prose averages ~1.3 BPE tokens per word; budgets add llm_budget_headroom on top
+TOKENS_PER_WORD = 1.35
+
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local approximation of the llama-3 tokenizer: one token per short word,
+    number group or symbol, plus one per further ~6 letters of long words.
+    Within ~10-15% on English prose, which is enough for budgeting.
+    """
+    return sum(1 + (len(piece) - 1) // 6 for piece in _TOKEN_PIECES.findall(text))
+
+class PromptTemplate:
+    """A str.format-style template split into literal and field parts once, up front"""
+    
+    def __init__(self, text: str):
+        self.text = text
+        self._parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(text)
+        ]
+        self.fields = {field for _, field in self._parts if field}
+        # Tokens of the fixed text; rendered prompts add only their values' tokens
+        self.static_tokens = estimate_tokens("".join(literal for literal, _ in self._parts))
+    
+    def render(self, **values) -> str:
+        return "".join(
+            literal + (str(values[field]) if field else "")
+            for literal, field in self._parts
+        )
+
+def _words_budget(max_words: int) -> int:
+    return math.ceil(max_words * TOKENS_PER_WORD * settings.llm_budget_headroom)
+
+def bullets_budget(max_bullets: int = 6, max_words: int = 15) -> int:
+    """Budget for "EXACTLY 4-6 bullets of 8-15 words": bullets x (words + the bullet marker)"""
+    return _words_budget(max_bullets * max_words) + 2 * max_bullets
+
+def prose_budget(max_words: int = 500) -> int:
+    return _words_budget(max_words)
+
+def outline_budget(items: int) -> int:
+    """Titles of at most ~10 words each, one per line"""
+    return _words_budget(items * 10) + items
+
+def deck_budget(slide_count: int) -> int:
+    # JSON wraps each slide's bullets in quotes, commas and an index
+    return slide_count * (bullets_budget() + 24) + 32
+
+def refine_budget(document_type: str, current_content: str) -> int:
+    """Refinements keep the format, but never budget less than the current text needs"""
+    base = bullets_budget() if document_type == "pptx" else prose_budget()
+    return max(base, math.ceil(estimate_tokens(current_content) * settings.llm_budget_headroom))
+
+class TokenUsage:
+    """Output tokens actually produced per task, against the budget that was granted"""
+    
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[Tuple[int, int]]] = {}
+        self._window = window
+        self._calls: Dict[str, int] = {}
+        self._truncated: Dict[str, int] = {}
+    
+    def record(self, task: str, output_tokens: Optional[int], budget: int, finish_reason: Optional[str] = None):
+        if output_tokens is None:
+            return
+        with self._lock:
+            self._samples.setdefault(task, deque(maxlen=self._window)).append((output_tokens, budget))
+            self._calls[task] = self._calls.get(task, 0) + 1
+            if finish_reason == "length":
+                self._truncated[task] = self._truncated.get(task, 0) + 1
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stats = {}
+            for task, samples in self._samples.items():
+                outputs = sorted(output for output, _ in samples)
+                stats[task] = {
+                    "calls": self._calls[task],
+                    "truncated": self._truncated.get(task, 0),
+                    "output_tokens_avg": round(sum(outputs) / len(outputs), 1),
+                    "output_tokens_p95": outputs[min(len(outputs) - 1, int(len(outputs) * 0.95))],
+                    "output_tokens_max": outputs[-1],
+                    "budget_avg": round(sum(budget for _, budget in samples) / len(samples), 1),
+                }
+            return stats
+
+token_usage = TokenUsage()
+
+GENERATE_DOCX = PromptTemplate("""You are a senior business consultant and expert writer with 15+ years of experience creating high-impact business documents for Fortune 500 companies.
+
+CONTEXT:
+Main Topic: {main_topic}
+Section Focus: "{section_title}"
+
+YOUR TASK:
+Write authoritative, data-informed content for this section that demonstrates deep subject matter expertise.
+
+CONTENT REQUIREMENTS:
+1. LENGTH: 300-500 words (substantive, not filler)
+2. STRUCTURE:
+   - Opening statement that hooks with insight or data point
+   - 2-3 well-developed paragraphs with concrete examples
+   - Practical implications or actionable takeaways
+3. QUALITY STANDARDS:
+   - Include specific metrics, frameworks, or methodologies where relevant
+   - Reference industry best practices or proven approaches
+   - Use precise business terminology (avoid vague generalities)
+   - Provide actionable insights, not just descriptions
+   - Support claims with logical reasoning or implied expertise
+4. TONE: Professional, authoritative, strategic (Forbes/HBR caliber)
+
+AVOID:
+- Generic statements like "This is important because..."
+- Obvious advice or platitudes
+- Repetitive phrasing
+- Filler words and fluff
+
+Deliver ONLY the section content - no meta-commentary, no section title repetition.""")
+
+GENERATE_PPTX = PromptTemplate("""You are a senior strategy consultant creating a C-suite presentation for a Fortune 500 company.
+
+CONTEXT:
+Presentation Topic: {main_topic}
+Current Slide: "{section_title}"
+
+YOUR TASK:
+Create punchy, executive-level bullet points that deliver maximum insight with minimum words.
+
+STRICT FORMATTING RULES:
+- Output EXACTLY 4-6 bullet points
+- Each bullet MUST start with "• " (bullet symbol + space)
+- Length: 8-15 words per bullet (concise and impactful)
+- NO paragraphs, NO numbered lists, NO extra text
+
+CONTENT QUALITY STANDARDS:
+- Lead with strong action verbs or specific metrics
+- Use precise business language (KPIs, ROI, scalability, etc.)
+- Include concrete elements: numbers, percentages, frameworks, or outcomes
+- Focus on strategic insights, not generic observations
+- Make each bullet deliver distinct value (no redundancy)
+
+EXAMPLES OF EXCELLENT BULLETS:
+• Implement AI-driven analytics to reduce operational costs by 30%
+• Leverage agile methodology for faster time-to-market execution
+• Establish cross-functional teams to drive innovation initiatives
+• Deploy predictive modeling to optimize resource allocation
+• Scale infrastructure using cloud-native architecture patterns
+
+AVOID:
+- Vague statements ("Improve efficiency", "Enhance performance")
+- Obvious points ("This is important", "We should focus on")
+- Repetitive phrasing across bullets
+- Starting every bullet the same way
+
+Deliver ONLY the bullet points in the exact format shown - nothing else.""")
+
+REFINE_PPTX = PromptTemplate("""You are a senior presentation coach refining executive-level slides.
+
+CURRENT SLIDE: "{section_title}"
+
+EXISTING BULLETS:
+{current_content}
+
+USER'S REFINEMENT REQUEST:
+{refinement_prompt}
+
+YOUR TASK:
+Revise the bullet points to address the user's request while maintaining C-suite quality.
+
+STRICT FORMATTING RULES:
+- Return EXACTLY 4-6 bullet points
+- Each bullet MUST start with "• " (bullet symbol + space)
+- Length: 8-15 words per bullet
+- NO paragraphs, NO numbered lists, NO meta-commentary
+
+QUALITY STANDARDS:
+- Keep the strategic, executive tone
+- Use precise business terminology and metrics where relevant
+- Ensure bullets are distinct and non-redundant
+- Lead with action verbs or concrete elements
+- Incorporate the user's feedback while maintaining professionalism
+
+Deliver ONLY the revised bullet points - nothing else.""")
+
+REFINE_DOCX = PromptTemplate("""You are a senior business consultant refining document content for executive review.
+
+SECTION: "{section_title}"
+
+CURRENT CONTENT:
+{current_content}
+
+USER'S REFINEMENT REQUEST:
+{refinement_prompt}
+
+YOUR TASK:
+Revise the content to address the user's feedback while maintaining high professional standards.
+
+REQUIREMENTS:
+- Incorporate the user's specific requests/changes
+- Maintain authoritative, strategic tone
+- Keep concrete examples, metrics, and frameworks
+- Ensure logical flow and coherence
+- Preserve word count (300-500 words) and paragraph structure
+- Use precise business language
+
+Deliver ONLY the refined content - no explanations or meta-commentary.""")
+
+OUTLINE_DOCX = PromptTemplate("""You are a senior business consultant structuring a high-impact document.
+
+TOPIC: {main_topic}
+
+YOUR TASK:
+Create a logical, comprehensive document outline with 6-8 section titles that would impress executive stakeholders.
+
+REQUIREMENTS:
+- Start with an executive summary or introduction section
+- Build a logical narrative flow (context → analysis → strategy → action)
+- Use clear, professional section titles (not vague)
+- Each title should indicate specific value/content
+- End with conclusions, recommendations, or next steps
+- Avoid generic titles like "Overview" or "Background"
+
+EXAMPLE QUALITY:
+Instead of: "Introduction"
+Use: "Market Landscape and Strategic Imperatives"
+
+Instead of: "Analysis"
+Use: "Competitive Positioning and Gap Analysis"
+
+Provide ONLY the section titles, one per line, no numbering, no bullets, no extra text.""")
+
+OUTLINE_PPTX = PromptTemplate("""You are a senior strategy consultant creating a presentation outline for C-suite executives.
+
+TOPIC: {main_topic}
+
+YOUR TASK:
+Create exactly {num_slides} impactful slide titles that tell a clear, compelling story.
+
+SLIDE STRUCTURE:
+1. Title slide with hook (not just topic name)
+2-3. Context/problem definition slides
+4-6. Core analysis/strategy slides
+7. Conclusions or recommendations
+8. Next steps or call-to-action
+
+TITLE QUALITY STANDARDS:
+- Each title: 3-7 words, punchy and specific
+- Use action-oriented or insight-driven language
+- Avoid generic labels ("Introduction", "Overview", "Background")
+- Create narrative flow (each slide builds on previous)
+- Make titles executive-friendly (strategic, not tactical)
+
+EXAMPLES OF STRONG TITLES:
+- "Market Disruption: AI's $2T Opportunity"
+- "Three Critical Capability Gaps"
+- "Strategic Roadmap: 18-Month Timeline"
+- "ROI Projections and Success Metrics"
+
+Provide ONLY the slide titles, one per line, no numbering, no bullets, no extra commentary.""")
+
+DECK = PromptTemplate("""You are a senior strategy consultant creating a C-suite presentation for a Fortune 500 company.
+
+PRESENTATION TOPIC: {main_topic}
+
+SLIDES:
+{slides}
+
+YOUR TASK:
+Write punchy, executive-level bullet points for EVERY slide above, so the deck reads as one coherent story:
+each slide builds on the previous ones, and no point is repeated across slides.
+
+RULES FOR EACH SLIDE:
+- EXACTLY 4-6 bullet points
+- 8-15 words per bullet, leading with strong action verbs or specific metrics
+- Use precise business language and concrete elements: numbers, percentages, frameworks, outcomes
+- No vague statements, platitudes or repetitive phrasing
+
+OUTPUT FORMAT:
+Return ONLY a JSON object of this shape, with one entry per slide in the same order:
+{{"slides": [{{"index": 1, "bullets": ["first bullet", "second bullet", "..."]}}]}}
+Bullets are plain strings without a leading bullet symbol.""")
@@ -0,0 +1,113 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from app.models import Project, Section
+from app.config import get_settings
+import multiprocessing
+import threading
+
+settings = get_settings()
+
+def project_snapshot(project: Project, sections: List[Section]) -> dict:
+    """Plain, picklable copy of what DocumentService needs to render a project"""
+    return {
+        "id": project.id,
+        "title": project.title,
+        "document_type": project.document_type.value,
+        "main_topic": project.main_topic,
+        "template": project.template,
+        "font_size": project.font_size,
+        "sections": [
+            {"id": section.id, "title": section.title, "content": section.content, "order": section.order}
+            for section in sections
+        ]
+    }
+
+def _warm_worker():
+    # Pay the python-docx/python-pptx/lxml import cost once per worker, not per export
+    import docx  # noqa: F401
+    import pptx  # noqa: F401
+    from app.services.document import document_service  # noqa: F401
+
+def _ping() -> bool:
+    return True
+
+def render_snapshot(snapshot: dict, path: str) -> bool:
+    """
+    Render a project snapshot straight to a file. Runs inside a pool worker.
+    Returns False if the file is missing images because fetching them failed.
+    """
+    from app.services.document import document_service
+    
+    project = SimpleNamespace(**{key: value for key, value in snapshot.items() if key != "sections"})
+    sections = [SimpleNamespace(**section) for section in snapshot["sections"]]
+    if snapshot["document_type"] == "docx":
+        document_service.generate_docx(project, sections, target=path)
+        return True
+    report: Dict[str, int] = {}
+    document_service.generate_pptx(project, sections, target=path, report=report)
+    return report["images_failed"] == 0
+
+class RenderExecutor:
+    """
+    Runs document rendering on a pool of warm worker processes so python-docx/pptx
+    work scales across cores instead of holding the GIL of an API worker.
+    With workers=0 rendering happens inline in the calling thread.
+    """
+    
+    def __init__(self, workers: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Create the pool and make every worker import its libraries up front"""
+        pool = self._get_pool()
+        if pool is None:
+            return
+        try:
+            for future in [pool.submit(_ping) for _ in range(self.workers)]:
+                future.result(timeout=self.timeout)
+        except Exception as e:
+            # Not fatal: render() falls back to inline rendering if the pool stays broken
+            print(f"Render pool warm-up failed: {str(e)}")
+            self.shutdown()
+    
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+    
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: API workers run threads and an event loop that must not be copied
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker
+                )
+            return self._pool
+    
+    def render(self, snapshot: dict, path: str) -> bool:
+        """
+        Render a snapshot to path; only the path crosses the process boundary,
+        never the bytes. False if the output is incomplete and must not be cached.
+        """
+        pool = self._get_pool()
+        if pool is None:
+            return render_snapshot(snapshot, path)
+        try:
+            return pool.submit(render_snapshot, snapshot, path).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); replace the pool and render this one inline
+            print("Render pool broken, restarting it")
+            self.shutdown()
+            return render_snapshot(snapshot, path)
+
+render_executor = RenderExecutor(settings.render_workers, settings.render_timeout_seconds)
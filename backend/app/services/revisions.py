@@ -0,0 +1,166 @@
+"""
+Compressed revision history.
+
+Revisions of a section form chains: every `snapshot_interval` revisions (or
+whenever a diff would not be smaller) the new content is stored in full,
+zlib-compressed; in between each revision stores a word-level diff against
+the new content of the revision before it. previous_content is always stored
+as a diff, and since it is normally the text the last revision produced it
+usually costs a few bytes. Any version is rebuilt from one range query over
+its chain, so reads never touch more than `snapshot_interval` rows.
+"""
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Revision
+from app.config import get_settings
+import json
+import re
+import zlib
+
+settings = get_settings()
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+_TOKEN = re.compile(r"\s+|\S+\s*")
+
+def _compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"))
+
+def _decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+def make_delta(base: str, text: str) -> bytes:
+    """
+    Compressed edit script turning base into text: a JSON list whose items are
+    either [start, end] (copy base[start:end]) or a string (insert it).
+    """
+    base_tokens = _TOKEN.findall(base)
+    tokens = _TOKEN.findall(text)
+    offsets = [0]
+    for token in base_tokens:
+        offsets.append(offsets[-1] + len(token))
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, base_tokens, tokens).get_opcodes():
+        if tag == "equal":
+            ops.append([offsets[i1], offsets[i2]])
+        elif j1 < j2:
+            ops.append("".join(tokens[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"))
+
+def apply_delta(base: str, delta: bytes) -> str:
+    ops = json.loads(zlib.decompress(delta))
+    return "".join(base[op[0]:op[1]] if isinstance(op, list) else op for op in ops)
+
+def encode_revision(
+    revision: Revision,
+    previous_content: str,
+    new_content: str,
+    base: Optional[Revision] = None,
+    base_content: Optional[str] = None,
+    snapshot_interval: Optional[int] = None
+):
+    """
+    Fill in the storage columns of `revision`. `base` is the section's latest
+    revision and `base_content` its new content; without them (or once the
+    chain is long enough) a snapshot is written.
+    """
+    snapshot_interval = snapshot_interval or settings.revision_snapshot_interval
+    snapshot = _compress_text(new_content)
+    revision.previous_content = ""
+    revision.new_content = ""
+    if base is not None and base.storage is not None and base.chain_depth + 1 < snapshot_interval:
+        delta = make_delta(base_content, new_content)
+        if len(delta) < len(snapshot):
+            revision.storage = DELTA
+            revision.base_revision_id = base.id
+            revision.snapshot_revision_id = base.id if base.storage == SNAPSHOT else base.snapshot_revision_id
+            revision.chain_depth = base.chain_depth + 1
+            revision.new_data = delta
+            revision.previous_data = make_delta(base_content, previous_content)
+            return
+    revision.storage = SNAPSHOT
+    revision.base_revision_id = None
+    revision.snapshot_revision_id = None
+    revision.chain_depth = 0
+    revision.new_data = snapshot
+    revision.previous_data = make_delta(new_content, previous_content)
+
+def _resolve(revision: Revision, chain: Dict[int, Revision], memo: Dict[int, str]) -> str:
+    """New content of `revision`, given the rows of its chain by id"""
+    if revision.id in memo:
+        return memo[revision.id]
+    if revision.storage is None:
+        content = revision.new_content
+    elif revision.storage == SNAPSHOT:
+        content = _decompress_text(revision.new_data)
+    else:
+        content = apply_delta(_resolve(chain[revision.base_revision_id], chain, memo), revision.new_data)
+    memo[revision.id] = content
+    return content
+
+def _previous(revision: Revision, chain: Dict[int, Revision], memo: Dict[int, str]) -> str:
+    if revision.storage is None:
+        return revision.previous_content
+    if revision.storage == SNAPSHOT:
+        return apply_delta(_resolve(revision, chain, memo), revision.previous_data)
+    return apply_delta(_resolve(chain[revision.base_revision_id], chain, memo), revision.previous_data)
+
+def revision_contents(revisions: List[Revision]) -> List[Tuple[Revision, str, str]]:
+    """
+    (revision, previous_content, new_content) for each revision. The list must
+    contain every revision of the chains involved (see _chain_query).
+    """
+    chain = {revision.id: revision for revision in revisions}
+    memo: Dict[int, str] = {}
+    return [
+        (revision, _previous(revision, chain, memo), _resolve(revision, chain, memo))
+        for revision in revisions
+    ]
+
+def _latest_query(section_id: int):
+    return select(Revision).where(Revision.section_id == section_id).order_by(Revision.id.desc()).limit(1)
+
+def _chain_query(revision: Revision):
+    """Rows needed to rebuild `revision`: its snapshot and every revision after it"""
+    start = revision.snapshot_revision_id if revision.storage == DELTA else revision.id
+    return select(Revision).where(
+        Revision.section_id == revision.section_id,
+        Revision.id >= start,
+        Revision.id <= revision.id
+    ).order_by(Revision.id)
+
+async def get_revision_content_async(db: AsyncSession, revision: Revision) -> Tuple[str, str]:
+    """(previous_content, new_content) of a single revision"""
+    if revision.storage == DELTA:
+        result = await db.execute(_chain_query(revision))
+        chain = list(result.scalars())
+    else:
+        chain = [revision]
+    contents = {r.id: (previous, new) for r, previous, new in revision_contents(chain)}
+    return contents[revision.id]
+
+async def add_revision_async(
+    db: AsyncSession,
+    section_id: int,
+    prompt: str,
+    previous_content: str,
+    new_content: str
+) -> Revision:
+    """Add a compressed revision to the session (the caller commits)"""
+    result = await db.execute(_latest_query(section_id))
+    base = result.scalar_one_or_none()
+    base_content = None
+    if base is not None:
+        base_content = (await get_revision_content_async(db, base))[1]
+    revision = Revision(section_id=section_id, prompt=prompt)
+    encode_revision(revision, previous_content, new_content, base, base_content)
+    db.add(revision)
+    return revision
+
+async def list_section_revisions_async(db: AsyncSession, section_id: int) -> List[Tuple[Revision, str, str]]:
+    """Full history of a section, oldest first, rebuilt from a single query"""
+    result = await db.execute(select(Revision).where(Revision.section_id == section_id).order_by(Revision.id))
+    return revision_contents(list(result.scalars()))
@@ -0,0 +1,182 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import case, or_, update
+from app.database import SessionLocal
+from app.models import Section
+from app.services.export_cache import invalidate_project_exports
+from app.config import get_settings
+import asyncio
+import threading
+import time
+
+settings = get_settings()
+
+@dataclass
+class PendingWrite:
+    project_id: int
+    content: str
+    first_at: float = field(default_factory=time.monotonic)
+    edited_at: datetime = field(default_factory=datetime.utcnow)
+
+class SectionWriteBuffer:
+    """
+    Write-behind buffer for section autosaves.
+    
+    Successive updates to a section are merged in memory and written once the
+    oldest of them is `window` seconds old, so an editor autosaving on every
+    keystroke costs one UPDATE per window instead of one commit per request.
+    All due sections are written in a single transaction. Lookups through
+    app.services.projects flush a project's or section's pending writes first,
+    so reads in this process never see stale content.
+    
+    Only content is buffered; likes and comments are written straight through.
+    The buffer is per process: another worker may serve the old text for up to
+    `window` seconds. Content is last-write-wins by edit time: a buffered edit
+    is only written if it is newer than the section's content_updated_at
+    (stamped by every ORM content write), so a late flush never overwrites a
+    newer edit buffered or written by another worker, and never touches the
+    section's other fields. Code in this process that writes content through
+    the ORM flushes the section first.
+    """
+    
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: Dict[int, PendingWrite] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.buffered = 0
+        self.written = 0
+        self.flushes = 0
+        self.superseded = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+    
+    def put(self, section_id: int, project_id: int, content: str) -> PendingWrite:
+        """Replace the section's pending content and return its pending write"""
+        with self._lock:
+            pending = self._pending.get(section_id)
+            if pending is None:
+                pending = self._pending[section_id] = PendingWrite(project_id, content)
+            pending.content = content
+            pending.edited_at = datetime.utcnow()
+            self.buffered += 1
+            return pending
+    
+    def has_pending(self, project_id: int = None, section_id: int = None) -> bool:
+        with self._lock:
+            if section_id is not None:
+                return section_id in self._pending
+            return any(pending.project_id == project_id for pending in self._pending.values())
+    
+    def needs_flush(self, project_id: int = None, section_id: int = None) -> bool:
+        """True if a lookup must flush (or wait for an in-flight flush) before reading"""
+        return self._flush_lock.locked() or self.has_pending(project_id=project_id, section_id=section_id)
+    
+    def _take(self, predicate) -> Dict[int, PendingWrite]:
+        with self._lock:
+            taken = {section_id: pending for section_id, pending in self._pending.items() if predicate(section_id, pending)}
+            for section_id in taken:
+                del self._pending[section_id]
+            return taken
+    
+    def flush_project(self, project_id: int):
+        self._flush(lambda _, pending: pending.project_id == project_id)
+    
+    def flush_section(self, section_id: int):
+        self._flush(lambda pending_section_id, _: pending_section_id == section_id)
+    
+    def flush_due(self):
+        """Write every section whose oldest buffered change is at least `window` old"""
+        now = time.monotonic()
+        self._flush(lambda _, pending: now - pending.first_at >= self.window)
+    
+    def flush_all(self):
+        self._flush(lambda _, __: True)
+    
+    def _flush(self, predicate):
+        # One writer at a time, taking its writes under the lock, so flushes of
+        # the same section can't reorder and returning means they are committed
+        with self._flush_lock:
+            self._write(self._take(predicate))
+    
+    def _write(self, writes: Dict[int, PendingWrite]):
+        if not writes:
+            return
+        db = SessionLocal()
+        try:
+            superseded = 0
+            for section_id, pending in writes.items():
+                result = db.execute(
+                    update(Section)
+                    .where(
+                        Section.id == section_id,
+                        or_(Section.content_updated_at.is_(None), Section.content_updated_at < pending.edited_at)
+                    )
+                    .values(
+                        content=pending.content,
+                        content_updated_at=pending.edited_at,
+                        # A like or comment saved since the edit keeps its (later) time
+                        updated_at=case(
+                            (Section.updated_at > pending.edited_at, Section.updated_at),
+                            else_=pending.edited_at
+                        )
+                    )
+                )
+                superseded += 1 - result.rowcount
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Section write-behind flush failed, retrying later: {str(e)}")
+            with self._lock:
+                for section_id, pending in writes.items():
+                    # Newer edits buffered meanwhile win over the failed batch
+                    current = self._pending.setdefault(section_id, pending)
+                    if current is not pending:
+                        current.first_at = pending.first_at
+            return
+        finally:
+            db.close()
+        self.written += len(writes) - superseded
+        self.superseded += superseded
+        self.flushes += 1
+        for project_id in {pending.project_id for pending in writes.values()}:
+            invalidate_project_exports(project_id)
+    
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush_all)
+    
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.window / 4)
+            try:
+                await asyncio.to_thread(self.flush_due)
+            except Exception as e:
+                print(f"Section write-behind error: {str(e)}")
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "buffered_updates": self.buffered,
+            "written_sections": self.written,
+            "superseded_sections": self.superseded,
+            "flushes": self.flushes,
+        }
+
+section_write_buffer = SectionWriteBuffer(settings.section_write_buffer_seconds)
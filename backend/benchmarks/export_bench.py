@@ -0,0 +1,311 @@
+"""
+Export benchmark for DocumentService.generate_docx / generate_pptx.
+
+Renders synthetic projects (5-200 sections, short bullets or ~500-word prose,
+every pptx template) and reports per case: median wall time, peak RSS,
+peak traced allocations and output size. Each case runs in a fresh
+interpreter so RSS and allocation numbers don't leak between cases.
+
+Pexels is replaced by an ImageService serving deterministic fixture photos
+(generated once into benchmarks/fixtures at Pexels "large" size). The cold
+render of a pptx case includes normalizing them; timed renders then hit the
+in-memory image cache, as exports do in steady state. Allocations are
+Python-level (tracemalloc): lxml's own C allocations are not included.
+
+    python -m benchmarks.export_bench                      # every case
+    python -m benchmarks.export_bench --quick              # a small subset
+    python -m benchmarks.export_bench --only pptx-200      # cases whose id contains the text
+    python -m benchmarks.export_bench --save main          # write benchmarks/baselines/main.json
+    python -m benchmarks.export_bench --compare main       # exit 1 on regressions against it
+
+Run from the backend directory. Baselines are machine specific: compare
+against one recorded on the same hardware.
+"""
+from dataclasses import asdict, dataclass
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import zlib
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+TEMPLATES = ["modern", "minimal", "corporate", "creative"]
+SIZES = [5, 20, 50, 200]
+QUICK_SIZES = [5, 50]
+CONTENT_KINDS = ["bullets", "prose"]
+FIXTURE_IMAGES = 8
+FIXTURE_SIZE = (1880, 1253)
+# Metrics compared against a baseline, with the relative increase tolerated
+REGRESSION_METRICS = ("wall_ms", "render_rss_mb", "alloc_peak_mb", "output_kb")
+
+_WORDS = (
+    "growth market strategy revenue customer digital platform operating margin pipeline "
+    "capability roadmap investment portfolio retention acquisition analytics efficiency "
+    "transformation segment pricing channel partner risk compliance talent automation "
+    "supply chain cost quarter target benchmark insight initiative execution scale"
+).split()
+
+@dataclass(frozen=True)
+class Case:
+    document_type: str
+    sections: int
+    content: str
+    template: str = "modern"
+    
+    @property
+    def id(self) -> str:
+        parts = [self.document_type, str(self.sections), self.content]
+        if self.document_type == "pptx":
+            parts.append(self.template)
+        return "-".join(parts)
+
+def all_cases(quick: bool = False) -> List[Case]:
+    sizes = QUICK_SIZES if quick else SIZES
+    templates = TEMPLATES[:1] if quick else TEMPLATES
+    cases = [Case("docx", size, content) for size in sizes for content in CONTENT_KINDS]
+    cases += [
+        Case("pptx", size, content, template)
+        for size in sizes for content in CONTENT_KINDS for template in templates
+    ]
+    return cases
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:]
+
+def synthetic_project(case: Case, seed: int = 7):
+    """Project and sections shaped like DocumentService's callers pass them (see render.render_snapshot)"""
+    rng = random.Random(f"{seed}-{case.id}")
+    project = SimpleNamespace(
+        id=1,
+        title=_sentence(rng, 6),
+        main_topic=_sentence(rng, 14),
+        template=case.template,
+        font_size=20
+    )
+    sections = []
+    for order in range(case.sections):
+        if case.content == "bullets":
+            content = "\n".join(f"• {_sentence(rng, rng.randint(8, 15))}" for _ in range(rng.randint(4, 6)))
+        else:
+            paragraphs = [
+                ". ".join(_sentence(rng, rng.randint(12, 22)) for _ in range(6)) + "."
+                for _ in range(4)
+            ]
+            content = "\n\n".join(paragraphs)
+        sections.append(SimpleNamespace(id=order + 1, title=_sentence(rng, rng.randint(3, 7)), content=content, order=order))
+    return project, sections
+
+def ensure_fixture_images(count: int = FIXTURE_IMAGES) -> List[str]:
+    """Paths of deterministic photo-like JPEGs at Pexels "large" size, generated on first use"""
+    from PIL import Image, ImageDraw, ImageFilter
+    
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = os.path.join(FIXTURE_DIR, f"photo-{index}.jpg")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        rng = random.Random(index)
+        image = Image.linear_gradient("L").resize(FIXTURE_SIZE).convert("RGB")
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x, y = rng.randrange(FIXTURE_SIZE[0]), rng.randrange(FIXTURE_SIZE[1])
+            radius = rng.randint(40, 300)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+        image = image.filter(ImageFilter.GaussianBlur(6))
+        noise = Image.frombytes("L", FIXTURE_SIZE, rng.randbytes(FIXTURE_SIZE[0] * FIXTURE_SIZE[1])).convert("RGB")
+        image = Image.blend(image, noise, 0.12)
+        image.save(path, format="JPEG", quality=90)
+    return paths
+
+def fixture_images(paths: List[str]) -> List[bytes]:
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(f.read())
+    return images
+
+def fixture_image_service(images: List[bytes]):
+    """ImageService whose searches and downloads are served from `images`, with an in-memory cache"""
+    from app.services.cache import MemoryLRUCache
+    from app.services.image import ImageService
+    from app.services.image_processing import normalize_image
+    
+    class FixtureImageService(ImageService):
+        def _search(self, query: str, orientation: str = "landscape") -> Optional[str]:
+            return f"fixture://{zlib.crc32(query.encode('utf-8')) % len(images)}"
+        
+        def _download(self, image_url, fit):
+            data = images[int(image_url.rsplit("/", 1)[1])]
+            return normalize_image(data, fit) if fit else data
+    
+    service = FixtureImageService(cache=MemoryLRUCache(max_entries=256))
+    service.pexels_api_key = "fixture"
+    return service
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1024 / 1024
+
+def run_case(case: Case, repeat: int) -> Dict[str, float]:
+    """Measure one case in this process (called in a fresh interpreter by main)"""
+    from app.services import document
+    
+    document.image_service = fixture_image_service(fixture_images(ensure_fixture_images()))
+    project, sections = synthetic_project(case)
+    
+    def render() -> int:
+        if case.document_type == "docx":
+            output = document.document_service.generate_docx(project, sections)
+        else:
+            output = document.document_service.generate_pptx(project, sections)
+        return len(output.getbuffer())
+    
+    # First render is the cold one: it pays for skeleton compilation and sets the RSS high-water mark
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    output_bytes = render()
+    cold_ms = (time.perf_counter() - started) * 1000
+    peak_rss = _rss_mb()
+    
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - started) * 1000)
+    
+    tracemalloc.start()
+    render()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "wall_ms": round(statistics.median(timings), 1),
+        "wall_min_ms": round(min(timings), 1),
+        "cold_ms": round(cold_ms, 1),
+        "peak_rss_mb": round(max(peak_rss, _rss_mb()), 1),
+        "render_rss_mb": round(peak_rss - rss_before, 1),
+        "alloc_peak_mb": round(alloc_peak / 1024 / 1024, 2),
+        "output_kb": round(output_bytes / 1024, 1),
+    }
+
+def _run_isolated(case: Case, repeat: int) -> Dict[str, float]:
+    command = [
+        sys.executable, "-m", "benchmarks.export_bench",
+        "--case", json.dumps(asdict(case)), "--repeat", str(repeat)
+    ]
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(command, cwd=backend_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Case {case.id} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def _environment() -> Dict[str, str]:
+    import docx
+    import PIL
+    import pptx
+    
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": str(os.cpu_count()),
+        "python-docx": getattr(docx, "__version__", "unknown"),
+        "python-pptx": pptx.__version__,
+        "Pillow": PIL.__version__,
+    }
+
+def _baseline_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Descriptions of every metric that got worse than baseline by more than threshold"""
+    regressions = []
+    for case_id, metrics in results.items():
+        previous = baseline.get(case_id)
+        if previous is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            old, new = previous.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append(f"{case_id}: {metric} {old} -> {new} (+{change:.0%})")
+    return regressions
+
+def _print_row(case_id: str, metrics: Dict[str, float], previous: Optional[Dict[str, float]]):
+    def cell(metric: str) -> str:
+        value = metrics[metric]
+        if previous and previous.get(metric):
+            return f"{value} ({(value - previous[metric]) / previous[metric]:+.0%})"
+        return str(value)
+    print(
+        f"{case_id:<32} {cell('wall_ms'):>18} {cell('cold_ms'):>18} {cell('peak_rss_mb'):>16}"
+        f" {cell('render_rss_mb'):>16} {cell('alloc_peak_mb'):>16} {cell('output_kb'):>18}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DOCX/PPTX export")
+    parser.add_argument("--quick", action="store_true", help=f"sizes {QUICK_SIZES}, modern template only")
+    parser.add_argument("--only", default=None, help="run only cases whose id contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="timed renders per case after the cold one")
+    parser.add_argument("--save", metavar="NAME", help="write results to baselines/NAME.json (or a .json path)")
+    parser.add_argument("--compare", metavar="NAME", help="compare with a saved baseline; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative increase counted as a regression")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.case:
+        print(json.dumps(run_case(Case(**json.loads(args.case)), args.repeat)))
+        return
+    
+    cases = [case for case in all_cases(args.quick) if not args.only or args.only in case.id]
+    # Generated here so no case's RSS includes making them
+    ensure_fixture_images()
+    baseline = {}
+    if args.compare:
+        with open(_baseline_path(args.compare)) as f:
+            baseline = json.load(f)["cases"]
+    
+    print(
+        f"{'case':<32} {'wall_ms':>18} {'cold_ms':>18} {'peak_rss_mb':>16}"
+        f" {'render_rss_mb':>16} {'alloc_peak_mb':>16} {'output_kb':>18}"
+    )
+    results = {}
+    for case in cases:
+        results[case.id] = _run_isolated(case, args.repeat)
+        _print_row(case.id, results[case.id], baseline.get(case.id))
+    
+    if args.save:
+        path = _baseline_path(args.save)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"environment": _environment(), "repeat": args.repeat, "cases": results}, f, indent=2, sort_keys=True)
+        print(f"\nSaved {len(results)} case(s) to {path}")
+    
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import multiprocessing
+import os
 
 # Gunicorn configuration for production deployment
 bind = "0.0.0.0:8000"
-workers = multiprocessing.cpu_count() * 2 + 1
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Workers inherit this, and split the LLM rate limits by it (see LLM_PROCESSES)
+os.environ["WEB_CONCURRENCY"] = str(workers)
 worker_class = "uvicorn.workers.UvicornWorker"
 keepalive = 120
 timeout = 120
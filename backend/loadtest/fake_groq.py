@@ -0,0 +1,169 @@
+"""
+Stand-in for Groq's OpenAI-compatible chat completions endpoint.
+
+Answers with content shaped like what each of our prompts asks for (outline
+titles, 4-6 bullets, prose, or the deck JSON object), honours max_tokens and
+stream=True, and can be told to be slow or to rate-limit:
+
+    python -m loadtest.fake_groq --port 8101 --latency-ms 400 --tokens-per-second 600 --rate-limit 0.05
+
+Point the API at it with GROQ_BASE_URL=http://127.0.0.1:8101. GET /stats
+returns what it has served.
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+_WORDS = (
+    "accelerate margin expansion through targeted pricing digital channels operating model "
+    "customer retention analytics pipeline investment roadmap quarterly growth capability "
+    "automation partners supply chain resilience market share benchmark execution"
+).split()
+
+class FakeGroqConfig:
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 100, tokens_per_second: float = 800,
+                 rate_limit: float = 0.0, retry_after: float = 1.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:]
+
+def _bullets(rng: random.Random) -> List[str]:
+    return [_sentence(rng, rng.randint(8, 15)) for _ in range(rng.randint(4, 6))]
+
+def completion_text(prompt: str, json_mode: bool, rng: random.Random) -> str:
+    """Plausible answer to one of app.services.prompts' templates"""
+    if json_mode:
+        slide_count = len(re.findall(r"^\d+\. ", prompt.split("SLIDES:", 1)[-1], re.MULTILINE)) or 1
+        slides = [{"index": index, "bullets": _bullets(rng)} for index in range(1, slide_count + 1)]
+        return json.dumps({"slides": slides})
+    if "titles, one per line" in prompt:
+        match = re.search(r"exactly (\d+)", prompt)
+        count = int(match.group(1)) if match else rng.randint(6, 8)
+        return "\n".join(_sentence(rng, rng.randint(3, 7)) for _ in range(count))
+    if "bullet" in prompt and '"• "' in prompt:
+        return "\n".join(f"• {bullet}" for bullet in _bullets(rng))
+    paragraphs = [". ".join(_sentence(rng, rng.randint(12, 20)) for _ in range(5)) + "." for _ in range(4)]
+    return "\n\n".join(paragraphs)
+
+def _truncate(text: str, max_tokens: int) -> Tuple[List[str], str]:
+    """Split into ~token pieces (a word plus its whitespace), cut at max_tokens"""
+    pieces = re.findall(r"\S+\s*", text)
+    if len(pieces) > max_tokens:
+        return pieces[:max_tokens], "length"
+    return pieces, "stop"
+
+def create_app(config: FakeGroqConfig) -> FastAPI:
+    app = FastAPI(title="Fake Groq")
+    stats: Dict[str, int] = {"requests": 0, "streams": 0, "rate_limited": 0, "completion_tokens": 0}
+
+    async def _latency():
+        delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(0.0, delay) / 1000)
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.post("/openai/v1/chat/completions")
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        if random.random() < config.rate_limit:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": str(config.retry_after)},
+                content={"error": {
+                    "message": "Rate limit reached (fake)",
+                    "type": "tokens",
+                    "code": "rate_limit_exceeded"
+                }}
+            )
+
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        pieces, finish_reason = _truncate(completion_text(prompt, json_mode, random.Random()), body.get("max_tokens") or 1024)
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(pieces),
+            "total_tokens": len(prompt) // 4 + len(pieces),
+        }
+        stats["completion_tokens"] += len(pieces)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+
+        if not body.get("stream"):
+            await _latency()
+            await asyncio.sleep(len(pieces) / config.tokens_per_second)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(pieces)},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            }
+
+        stats["streams"] += 1
+
+        def chunk(delta: dict, finish=None, **extra) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            await _latency()
+            yield chunk({"role": "assistant", "content": ""})
+            # A few pieces per event, paced at tokens_per_second
+            for start in range(0, len(pieces), 4):
+                await asyncio.sleep(len(pieces[start:start + 4]) / config.tokens_per_second)
+                yield chunk({"content": "".join(pieces[start:start + 4])})
+            yield chunk({}, finish_reason, x_groq={"id": completion_id, "usage": usage})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Groq chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--latency-ms", type=float, default=300, help="time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--tokens-per-second", type=float, default=800, help="generation speed")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds sent with 429s")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeGroqConfig(args.latency_ms, args.jitter_ms, args.tokens_per_second, args.rate_limit, args.retry_after)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Stand-in for the Pexels search API and its image CDN.
+
+Searches resolve deterministically to one of the benchmark fixture photos
+(see benchmarks/export_bench.py), served from this same server:
+
+    python -m loadtest.fake_pexels --port 8102 --latency-ms 80
+
+Point the API at it with PEXELS_BASE_URL=http://127.0.0.1:8102/v1 (and any
+non-empty PEXELS_API_KEY). GET /stats returns what it has served.
+"""
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+from benchmarks.export_bench import ensure_fixture_images, fixture_images
+import argparse
+import asyncio
+import random
+import zlib
+
+def create_app(latency_ms: float = 80, jitter_ms: float = 30, miss_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Fake Pexels")
+    images = fixture_images(ensure_fixture_images())
+    stats = {"searches": 0, "misses": 0, "downloads": 0, "bytes": 0}
+
+    async def _latency():
+        await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.get("/v1/search")
+    async def search(request: Request, query: str, per_page: int = 1):
+        await _latency()
+        stats["searches"] += 1
+        if random.random() < miss_rate:
+            stats["misses"] += 1
+            return {"page": 1, "per_page": per_page, "photos": [], "total_results": 0}
+        photo_id = zlib.crc32(query.encode("utf-8")) % len(images)
+        url = f"{str(request.base_url).rstrip('/')}/photos/{photo_id}.jpg"
+        return {
+            "page": 1,
+            "per_page": per_page,
+            "photos": [{"id": photo_id, "src": {"original": url, "large": url, "medium": url}}],
+            "total_results": 1,
+        }
+
+    @app.get("/photos/{photo_id}.jpg")
+    async def photo(photo_id: int):
+        if not 0 <= photo_id < len(images):
+            raise HTTPException(status_code=404)
+        await _latency()
+        stats["downloads"] += 1
+        stats["bytes"] += len(images[photo_id])
+        return Response(content=images[photo_id], media_type="image/jpeg")
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Pexels search and image server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8102)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=30)
+    parser.add_argument("--miss-rate", type=float, default=0.0, help="fraction of searches with no results")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.latency_ms, args.jitter_ms, args.miss_rate), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
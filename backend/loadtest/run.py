@@ -0,0 +1,300 @@
+"""
+End-to-end load test of the API against local Groq and Pexels stand-ins.
+
+Starts loadtest.fake_groq, loadtest.fake_pexels and the API (uvicorn main:app
+on a throwaway SQLite database and cache directory, pointed at the fakes via
+GROQ_BASE_URL / PEXELS_BASE_URL), then runs --users concurrent users. Each
+registers, logs in and repeats --journeys times:
+ai-suggest -> create project -> generate-content -> refine -> export.
+Reports per-endpoint p50/p95/p99 latency, errors and throughput.
+
+    python -m loadtest.run --users 20 --journeys 3
+    python -m loadtest.run --users 50 --groq-latency-ms 800 --groq-rate-limit 0.1 --stream
+    python -m loadtest.run --app-url http://127.0.0.1:8000   # an API you started yourself
+
+Run from the backend directory. With --app-url the API must already be
+configured with the fakes' URLs (and its own rate limits); the fakes are
+still started unless --no-fakes is given.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_TOPICS = [
+    "Expanding a regional grocery chain into online delivery",
+    "Cloud cost optimization for a mid-size SaaS company",
+    "Launching a loyalty program for a coffee franchise",
+    "Reducing churn in a B2B analytics platform",
+    "Supply chain resilience for consumer electronics",
+    "Digital transformation of a community bank",
+]
+
+class Recorder:
+    """Latencies per endpoint label, plus error counts"""
+    
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.journeys = 0
+    
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, stream: bool = False, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            if stream:
+                async with client.stream(method, url, **kwargs) as response:
+                    await response.aread()
+            else:
+                response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.errors[label] += 1
+            self.statuses[label][0] += 1
+            print(f"{label}: {type(e).__name__}: {e}", file=sys.stderr)
+            return None
+        finally:
+            self.latencies[label].append((time.perf_counter() - started) * 1000)
+        self.statuses[label][response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return response
+    
+    def report(self, elapsed: float) -> Dict[str, object]:
+        endpoints = {}
+        for label, samples in self.latencies.items():
+            ordered = sorted(samples)
+            endpoints[label] = {
+                "count": len(ordered),
+                "errors": self.errors[label],
+                "statuses": dict(self.statuses[label]),
+                "p50_ms": round(percentile(ordered, 50), 1),
+                "p95_ms": round(percentile(ordered, 95), 1),
+                "p99_ms": round(percentile(ordered, 99), 1),
+                "max_ms": round(ordered[-1], 1),
+                "rps": round(len(ordered) / elapsed, 2),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "requests_per_second": round(total / elapsed, 2),
+            "journeys": self.journeys,
+            "journeys_per_minute": round(self.journeys / elapsed * 60, 2),
+            "endpoints": endpoints,
+        }
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+async def user_session(client: httpx.AsyncClient, recorder: Recorder, user_index: int, args):
+    rng = random.Random(user_index)
+    username = f"load{user_index}_{rng.randrange(10 ** 8)}"
+    password = "load-test-password"
+    registered = await recorder.request(client, "POST /api/auth/register", "POST", "/api/auth/register", json={
+        "email": f"{username}@example.com", "username": username, "password": password
+    })
+    if registered is None:
+        return
+    login = await recorder.request(client, "POST /api/auth/login", "POST", "/api/auth/login", data={
+        "username": username, "password": password
+    })
+    if login is None:
+        return
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    
+    for journey in range(args.journeys):
+        document_type = args.document_type if args.document_type != "mixed" else rng.choice(["docx", "pptx"])
+        topic = f"{rng.choice(_TOPICS)} ({username} #{journey})"
+        
+        suggested = await recorder.request(client, "POST /api/projects/ai-suggest", "POST", "/api/projects/ai-suggest", headers=headers, json={
+            "main_topic": topic, "document_type": document_type, "num_items": args.sections
+        })
+        titles = (suggested.json() if suggested is not None else [])[:args.sections]
+        titles = titles or [f"Section {order + 1}" for order in range(args.sections)]
+        
+        created = await recorder.request(client, "POST /api/projects", "POST", "/api/projects", headers=headers, json={
+            "title": topic[:60],
+            "document_type": document_type,
+            "main_topic": topic,
+            "template": rng.choice(["modern", "minimal", "corporate", "creative"]),
+            "sections": [{"title": title, "order": order} for order, title in enumerate(titles)]
+        })
+        if created is None:
+            continue
+        project = created.json()
+        
+        await recorder.request(client, "POST /api/projects/generate-content", "POST", "/api/projects/generate-content", headers=headers, json={
+            "project_id": project["id"]
+        })
+        
+        section_id = rng.choice(project["sections"])["id"]
+        refine = {"section_id": section_id, "prompt": "Make it more concise and add one metric"}
+        if args.stream:
+            await recorder.request(client, "POST /api/projects/refine-content/stream", "POST", "/api/projects/refine-content/stream", stream=True, headers=headers, json=refine)
+        else:
+            await recorder.request(client, "POST /api/projects/refine-content", "POST", "/api/projects/refine-content", headers=headers, json=refine)
+        
+        await recorder.request(client, "GET /api/projects/{id}/export", "GET", f"/api/projects/{project['id']}/export", headers=headers)
+        recorder.journeys += 1
+
+async def drive(args, app_url: str) -> Dict[str, object]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        async def staggered(user_index: int):
+            await asyncio.sleep(args.ramp_seconds * user_index / max(1, args.users))
+            await user_session(client, recorder, user_index, args)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(staggered(index) for index in range(args.users)))
+        elapsed = time.perf_counter() - started
+    return recorder.report(elapsed)
+
+def _spawn(module_args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *module_args], cwd=BACKEND_DIR, env=env)
+
+def _wait_for(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode} before becoming ready")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+def _fetch_json(url: str, headers: Optional[Dict[str, str]] = None) -> Optional[dict]:
+    try:
+        return httpx.get(url, headers=headers, timeout=5).json()
+    except (httpx.HTTPError, ValueError):
+        return None
+
+def print_report(report: Dict[str, object]):
+    print(f"\n{'endpoint':<44} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/s':>7}")
+    for label, row in report["endpoints"].items():
+        print(
+            f"{label:<44} {row['count']:>6} {row['errors']:>6} {row['p50_ms']:>9} {row['p95_ms']:>9}"
+            f" {row['p99_ms']:>9} {row['max_ms']:>9} {row['rps']:>7}"
+        )
+    print(
+        f"\n{report['requests']} requests, {report['errors']} errors in {report['elapsed_seconds']}s:"
+        f" {report['requests_per_second']} req/s, {report['journeys']} journeys"
+        f" ({report['journeys_per_minute']}/min)"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API against fake Groq/Pexels servers")
+    parser.add_argument("--users", type=int, default=10, help="concurrent users")
+    parser.add_argument("--journeys", type=int, default=2, help="projects each user creates, generates and exports")
+    parser.add_argument("--sections", type=int, default=6, help="sections/slides per project")
+    parser.add_argument("--document-type", choices=["docx", "pptx", "mixed"], default="mixed")
+    parser.add_argument("--stream", action="store_true", help="refine through the streaming endpoint")
+    parser.add_argument("--ramp-seconds", type=float, default=2.0, help="spread user start times over this long")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout")
+    parser.add_argument("--app-url", help="use an already running API instead of starting one")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--app-workers", type=int, default=1, help="uvicorn workers for the started API")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="BCRYPT_ROUNDS for the started API")
+    parser.add_argument("--no-fakes", action="store_true", help="don't start the fake servers")
+    parser.add_argument("--groq-port", type=int, default=8101)
+    parser.add_argument("--groq-latency-ms", type=float, default=300)
+    parser.add_argument("--groq-tokens-per-second", type=float, default=800)
+    parser.add_argument("--groq-rate-limit", type=float, default=0.0, help="fraction of LLM calls answered with 429")
+    parser.add_argument("--pexels-port", type=int, default=8102)
+    parser.add_argument("--pexels-latency-ms", type=float, default=80)
+    parser.add_argument("--json", metavar="PATH", help="also write the report (with fake and API metrics) here")
+    args = parser.parse_args()
+    
+    groq_url = f"http://127.0.0.1:{args.groq_port}"
+    pexels_url = f"http://127.0.0.1:{args.pexels_port}"
+    processes: List[subprocess.Popen] = []
+    # For an --app-url API, export the METRICS_TOKEN it was started with
+    metrics_token = os.environ.get("METRICS_TOKEN") or secrets.token_hex(16)
+    workdir = tempfile.TemporaryDirectory(prefix="pw-loadtest-")
+    try:
+        if not args.no_fakes:
+            processes.append(_spawn([
+                "-m", "loadtest.fake_groq", "--port", str(args.groq_port),
+                "--latency-ms", str(args.groq_latency_ms),
+                "--tokens-per-second", str(args.groq_tokens_per_second),
+                "--rate-limit", str(args.groq_rate_limit)
+            ]))
+            _wait_for(f"{groq_url}/stats", processes[-1])
+            processes.append(_spawn([
+                "-m", "loadtest.fake_pexels", "--port", str(args.pexels_port),
+                "--latency-ms", str(args.pexels_latency_ms)
+            ]))
+            _wait_for(f"{pexels_url}/stats", processes[-1])
+        
+        app_url = args.app_url
+        if not app_url:
+            app_url = f"http://127.0.0.1:{args.app_port}"
+            env = {
+                **os.environ,
+                "DATABASE_URL": f"sqlite:///{os.path.join(workdir.name, 'loadtest.db')}",
+                "GROQ_API_KEY": "fake",
+                "GROQ_BASE_URL": groq_url,
+                "PEXELS_API_KEY": "fake",
+                "PEXELS_BASE_URL": f"{pexels_url}/v1",
+                "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+                # The fake has no quota; leave pacing to its latency and 429s
+                "LLM_REQUESTS_PER_MINUTE": "100000",
+                "LLM_TOKENS_PER_MINUTE": "100000000",
+                "LLM_BACKOFF_BASE_SECONDS": "0.2",
+                "LLM_CACHE_PATH": os.path.join(workdir.name, "llm.sqlite3"),
+                "IMAGE_CACHE_PATH": os.path.join(workdir.name, "images.sqlite3"),
+                "IMAGE_BLOB_DIR": os.path.join(workdir.name, "blobs"),
+                "EXPORT_CACHE_DIR": os.path.join(workdir.name, "exports"),
+                "METRICS_TOKEN": metrics_token,
+            }
+            subprocess.run([sys.executable, "migrate_db.py"], cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+            processes.append(_spawn([
+                "-m", "uvicorn", "main:app", "--port", str(args.app_port),
+                "--workers", str(args.app_workers), "--log-level", "warning"
+            ], env=env))
+            _wait_for(f"{app_url}/health", processes[-1])
+        
+        print(f"Running {args.users} user(s) x {args.journeys} journey(s) against {app_url}")
+        report = asyncio.run(drive(args, app_url))
+        print_report(report)
+        
+        if args.json:
+            report["fake_groq"] = _fetch_json(f"{groq_url}/stats")
+            report["fake_pexels"] = _fetch_json(f"{pexels_url}/stats")
+            report["api_metrics"] = _fetch_json(f"{app_url}/metrics", {"Authorization": f"Bearer {metrics_token}"})
+            report["arguments"] = vars(args)
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {args.json}")
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        workdir.cleanup()
+
+if __name__ == "__main__":
+    main()
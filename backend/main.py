@@ -1,16 +1,42 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import Depends, FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import auth, projects
+from app.config import get_settings
+from app.database import engine, async_engine, pool_stats
+from app.routers import auth, projects, jobs
+from app.services.jobs import generation_worker
+from app.services.llm import llm_response_cache, llm_scheduler
+from app.services.prompts import token_usage
+from app.services.auth import principal_cache, password_hasher
+from app.services.export_cache import export_cache
+from app.services.image import image_service
+from app.services.render import render_executor
+from app.services.section_writes import section_write_buffer
+from typing import Optional
 import os
+import secrets
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+settings = get_settings()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Run the generation job worker inside the API process unless disabled
+    if settings.job_worker_enabled:
+        generation_worker.start()
+    # Spin up the rendering processes before the first export needs them
+    await asyncio.to_thread(render_executor.start)
+    section_write_buffer.start()
+    yield
+    await section_write_buffer.stop()
+    await generation_worker.stop()
+    render_executor.shutdown()
 
 app = FastAPI(
     title="PresentWallah - AI Document Creation",
     description="Professional AI-powered document and presentation generation platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - allow all origins for simplicity (you can restrict later)
@@ -25,6 +51,7 @@ app.add_middleware(
 # Include routers
 app.include_router(auth.router)
 app.include_router(projects.router)
+app.include_router(jobs.router)
 
 @app.get("/")
 def root():
@@ -37,3 +64,30 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+def require_metrics_token(authorization: Optional[str] = Header(None)):
+    """/metrics is off unless METRICS_TOKEN is set, and then needs it as a bearer token"""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def metrics():
+    """Cache and pool counters for capacity tuning"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "section_write_buffer": section_write_buffer.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "llm_tokens": token_usage.stats(),
+        "llm_cache": llm_response_cache.stats() if llm_response_cache else None,
+        "export_cache": export_cache.stats() if export_cache else None,
+        "image_blobs": image_service.blobs.stats() if image_service.blobs else None,
+        "db_pool": {"sync": pool_stats(engine), "async": pool_stats(async_engine.sync_engine)}
+    }
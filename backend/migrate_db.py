@@ -1,37 +1,37 @@
 """
-Database migration script to add template and font_size columns to projects table
+Apply pending database migrations (see app/migrations).
+
+    python migrate_db.py            # migrate to the latest version
+    python migrate_db.py --status   # show applied and pending versions
+    python migrate_db.py --to 2     # migrate up to a specific version
+
+Uses DATABASE_URL, so it works against the same SQLite file or PostgreSQL
+database the API is configured for. Run it before starting the API/worker.
 """
-import sqlite3
+import argparse
+from app.database import engine
+from app.migrations import current_version, migrate, pending_migrations
 
-def migrate():
-    conn = sqlite3.connect('presentwallah.db')
-    cursor = conn.cursor()
+def main():
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--status", action="store_true", help="show the current version and pending migrations")
+    parser.add_argument("--to", type=int, default=None, help="stop after this version")
+    args = parser.parse_args()
     
-    # Check if columns already exist
-    cursor.execute("PRAGMA table_info(projects)")
-    columns = [col[1] for col in cursor.fetchall()]
+    if args.status:
+        print(f"Current version: {current_version(engine)}")
+        pending = pending_migrations(engine)
+        for migration in pending:
+            print(f"  pending: {migration.version:04d}_{migration.name}")
+        if not pending:
+            print("✓ Database is up to date")
+        return
     
-    # Add template column if it doesn't exist
-    if 'template' not in columns:
-        print("Adding 'template' column...")
-        cursor.execute("ALTER TABLE projects ADD COLUMN template VARCHAR(50) DEFAULT 'modern'")
-        cursor.execute("UPDATE projects SET template = 'modern' WHERE template IS NULL")
-        print("✓ Added 'template' column")
+    applied = migrate(engine, target=args.to)
+    if applied:
+        print(f"\nMigration complete! Now at version {current_version(engine)}")
     else:
-        print("✓ 'template' column already exists")
-    
-    # Add font_size column if it doesn't exist
-    if 'font_size' not in columns:
-        print("Adding 'font_size' column...")
-        cursor.execute("ALTER TABLE projects ADD COLUMN font_size INTEGER DEFAULT 20")
-        cursor.execute("UPDATE projects SET font_size = 20 WHERE font_size IS NULL")
-        print("✓ Added 'font_size' column")
-    else:
-        print("✓ 'font_size' column already exists")
-    
-    conn.commit()
-    conn.close()
-    print("\nMigration complete!")
+        print("✓ Database is up to date")
 
 if __name__ == "__main__":
-    migrate()
+    main()
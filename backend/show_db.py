@@ -78,9 +78,9 @@ print("  HOW IT WORKS")
 print("="*60)
 print("""
 1. When you refine content:
-   ✓ Old content saved in 'revisions.previous_content'
+   ✓ Old and new content saved compressed in 'revisions.previous_data' / 'revisions.new_data'
+     (full snapshots every few revisions, diffs in between)
    ✓ Prompt saved in 'revisions.prompt'
-   ✓ New content saved in 'revisions.new_content'
    ✓ Section updated with new content
 
 2. When you add feedback:
@@ -0,0 +1,65 @@
+"""
+Shared fixtures. The app reads its settings at import time, so the test
+environment (a throwaway SQLite database and cache directories, inline
+rendering, no background job worker) is set up before anything from app/ is
+imported.
+"""
+import os
+import tempfile
+import uuid
+
+_tmp = tempfile.mkdtemp(prefix="presentwallah-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    "LLM_CACHE_PATH": "",
+    "IMAGE_CACHE_PATH": os.path.join(_tmp, "images.sqlite3"),
+    "IMAGE_BLOB_DIR": os.path.join(_tmp, "blobs"),
+    "EXPORT_CACHE_DIR": os.path.join(_tmp, "exports"),
+    "RENDER_WORKERS": "0",
+    "JOB_WORKER_ENABLED": "false",
+    "BCRYPT_ROUNDS": "4",
+    "PEXELS_API_KEY": "",
+    "GROQ_API_KEY": "",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from app.database import engine
+from app.migrations import migrate
+
+migrate(engine, log=lambda message: None)
+
+from main import app
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager: the lifespan's job worker, render pool
+    # and write-behind task stay off, so tests drive them explicitly
+    return TestClient(app)
+
+@pytest.fixture
+def auth_headers(client):
+    username = f"user{uuid.uuid4().hex[:12]}"
+    password = "secret-password"
+    response = client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": password,
+    })
+    assert response.status_code == 201, response.text
+    response = client.post("/api/auth/login", data={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def create_project(client, auth_headers):
+    def create(section_count: int = 3, document_type: str = "docx") -> dict:
+        response = client.post("/api/projects", headers=auth_headers, json={
+            "title": "Quarterly review",
+            "document_type": document_type,
+            "main_topic": "Quarterly business review",
+            "sections": [{"title": f"Section {order}", "order": order} for order in range(section_count)],
+        })
+        assert response.status_code == 201, response.text
+        return response.json()
+    return create
@@ -0,0 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.services.cache import BlobStore
+import os
+
+def test_concurrent_puts_of_the_same_bytes(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=1024 * 1024)
+    data = os.urandom(64 * 1024)
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        digests = set(pool.map(lambda _: store.put(data), range(32)))
+    
+    assert digests == {BlobStore.digest(data)}
+    assert store.get(digests.pop()) == data
+    files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert len(files) == 1
+    assert not files[0].endswith(".tmp")
@@ -0,0 +1,14 @@
+from app.config import Settings
+from pydantic import ValidationError
+import pytest
+
+@pytest.mark.parametrize("field", ["llm_requests_per_minute", "llm_tokens_per_minute"])
+@pytest.mark.parametrize("value", [0, -5])
+def test_llm_rate_limits_must_be_positive(field, value):
+    with pytest.raises(ValidationError):
+        Settings(**{field: value})
+
+def test_llm_limits_are_split_across_processes():
+    assert Settings(web_concurrency=5).llm_process_count == 5
+    assert Settings(web_concurrency=5, llm_processes=6).llm_process_count == 6
+    assert Settings().llm_process_count == 1
@@ -0,0 +1,43 @@
+from app.services.export_cache import ExportCache
+import os
+
+def _render(cache: ExportCache, data: bytes) -> str:
+    path = cache.temp_path("docx")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def test_invalidate_only_touches_the_project(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.store(1, "a" * 16, "docx", _render(cache, b"one"))
+    cache.store(2, "b" * 16, "docx", _render(cache, b"two"))
+    
+    cache.invalidate(1)
+    
+    assert cache.get(1, "a" * 16, "docx") is None
+    assert cache.get(2, "b" * 16, "docx") is not None
+    assert not os.path.exists(tmp_path / "1")
+
+def test_eviction_spans_project_directories(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=2500)
+    for project_id in range(1, 4):
+        cache.store(project_id, "c" * 16, "docx", _render(cache, bytes(1000)))
+        os.utime(cache._path(project_id, "c" * 16, "docx"), (project_id, project_id))
+    cache.store(4, "c" * 16, "docx", _render(cache, bytes(1000)))
+    
+    assert cache.get(1, "c" * 16, "docx") is None
+    assert cache.get(2, "c" * 16, "docx") is None
+    assert cache.stats()["entries"] == 2
+
+def test_served_copy_outlives_invalidation(tmp_path):
+    cache = ExportCache(str(tmp_path), max_bytes=1024 * 1024)
+    rendered = _render(cache, b"deck")
+    cache.store(1, "d" * 16, "pptx", rendered)
+    os.remove(rendered)
+    
+    served = cache.get(1, "d" * 16, "pptx")
+    cache.invalidate(1)
+    
+    with open(served, "rb") as f:
+        assert f.read() == b"deck"
+    assert cache.get(1, "d" * 16, "pptx") is None
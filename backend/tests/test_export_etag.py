@@ -0,0 +1,25 @@
+from app.routers.projects import _etag_matches
+import pytest
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", W/"abc"', True),
+    ('"xyz","abc"', True),
+    ("*", True),
+    ('"xyz"', False),
+    ('"ab"', False),
+])
+def test_if_none_match(header, matches):
+    assert _etag_matches(header, '"abc"') is matches
+
+def test_export_revalidates_with_a_tag_list(client, auth_headers, create_project):
+    project = create_project(2)
+    url = f"/api/projects/{project['id']}/export"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+    
+    response = client.get(url, headers={**auth_headers, "If-None-Match": f'"stale", W/{etag}'})
+    
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
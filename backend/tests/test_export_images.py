@@ -0,0 +1,42 @@
+from app.config import get_settings
+from app.services.export_cache import export_cache
+from app.services.image import ImageFetchError, image_service
+import os
+
+def _failing_search(query, orientation="landscape"):
+    raise ImageFetchError("HTTP 503")
+
+def test_prefetch_leaves_out_failed_lookups(monkeypatch):
+    monkeypatch.setattr(image_service, "pexels_api_key", "test-key")
+    
+    def search(query, orientation="landscape"):
+        if query == "broken":
+            raise ImageFetchError("HTTP 503")
+        return None
+    
+    monkeypatch.setattr(image_service, "_search", search)
+    
+    images = image_service.prefetch({1: ["none"], 2: ["broken"]})
+    
+    assert images == {1: None}
+
+def test_export_with_failed_images_is_not_cached(client, auth_headers, create_project, monkeypatch):
+    monkeypatch.setattr(image_service, "pexels_api_key", "test-key")
+    monkeypatch.setattr(image_service, "_search", _failing_search)
+    project = create_project(3, "pptx")
+    
+    response = client.get(f"/api/projects/{project['id']}/export", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    assert not os.path.exists(export_cache._project_dir(project["id"]))
+
+def test_image_settings_change_the_export_etag(client, auth_headers, create_project, monkeypatch):
+    project = create_project(3, "pptx")
+    url = f"/api/projects/{project['id']}/export"
+    
+    first = client.get(url, headers=auth_headers).headers["etag"]
+    monkeypatch.setattr(get_settings(), "image_dpi", get_settings().image_dpi + 50)
+    second = client.get(url, headers=auth_headers).headers["etag"]
+    
+    assert first != second
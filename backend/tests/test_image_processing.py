@@ -0,0 +1,59 @@
+from PIL import Image
+from app.services.image_processing import ImageFit, normalize_image
+import io
+import pytest
+
+def _encode(image: Image.Image, format: str = "JPEG", **options) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format=format, **options)
+    return output.getvalue()
+
+def _decode(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+def test_for_box_converts_inches_at_dpi():
+    assert ImageFit.for_box(4, 3, 150, quality=70) == ImageFit(600, 450, 70)
+
+def test_downsamples_to_the_box_as_progressive_jpeg():
+    data = _encode(Image.effect_noise((1600, 1200), 64).convert("RGB"), quality=95)
+    normalized = normalize_image(data, ImageFit(400, 300))
+    image = _decode(normalized)
+    assert image.format == "JPEG"
+    assert image.size == (400, 300)
+    assert image.info.get("progressive") or image.info.get("progression")
+    assert len(normalized) < len(data)
+
+def test_crops_the_center_to_the_box_aspect_ratio():
+    # Red, green and blue thirds; a square box keeps only the green middle
+    source = Image.new("RGB", (300, 100))
+    for index, color in enumerate([(255, 0, 0), (0, 255, 0), (0, 0, 255)]):
+        source.paste(color, (index * 100, 0, (index + 1) * 100, 100))
+    image = _decode(normalize_image(_encode(source, format="PNG"), ImageFit(50, 50)))
+    assert image.size == (50, 50)
+    for point in [(2, 25), (25, 25), (47, 25)]:
+        red, green, blue = image.getpixel(point)
+        assert green > 200 and red < 60 and blue < 60, (point, image.getpixel(point))
+
+def test_never_enlarges_a_small_image():
+    image = _decode(normalize_image(_encode(Image.new("RGB", (200, 100), "gray")), ImageFit(800, 800)))
+    assert image.size == (100, 100)
+
+def test_flattens_transparency_onto_white():
+    source = Image.new("RGBA", (100, 100), (255, 0, 0, 0))
+    image = _decode(normalize_image(_encode(source, format="PNG"), ImageFit(100, 100)))
+    assert image.mode == "RGB"
+    assert all(channel > 245 for channel in image.getpixel((50, 50)))
+
+def test_applies_exif_orientation():
+    # Stored landscape, tagged "rotate 90° clockwise": displayed (and normalized) as portrait
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    data = _encode(Image.new("RGB", (200, 100), "gray"), exif=exif.tobytes())
+    image = _decode(normalize_image(data, ImageFit(100, 200)))
+    assert image.size == (100, 200)
+
+@pytest.mark.parametrize("data", [b"", b"not an image", _encode(Image.new("RGB", (10, 10)))[:20]])
+def test_undecodable_data_returns_none(data):
+    assert normalize_image(data, ImageFit(100, 100)) is None
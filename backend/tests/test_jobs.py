@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, inspect, update
+from app.database import AsyncSessionLocal, SessionLocal, async_engine
+from app.migrations import migrate
+from app.models import GenerationJob, GenerationJobItem, JobStatus, Section
+from app.services import jobs
+from app.services.projects import get_user_project_async
+import asyncio
+
+async def _enqueue(project: dict):
+    try:
+        async with AsyncSessionLocal() as db:
+            loaded = await get_user_project_async(db, project["id"], project["user_id"])
+            job = await jobs.enqueue_generation_job(db, loaded)
+            return job.id, job.status
+    finally:
+        # Pooled aiosqlite connections belong to this asyncio.run loop
+        await async_engine.dispose()
+
+def test_concurrent_enqueue_returns_the_active_job(create_project, monkeypatch):
+    project = create_project(section_count=2)
+    first_id, first_status = asyncio.run(_enqueue(project))
+    assert first_status == jobs.JobStatus.QUEUED
+    
+    # A second request that checked for an active job before the first one committed
+    active_job = jobs._active_job
+    calls = []
+    
+    async def stale_check(db, project_id):
+        calls.append(project_id)
+        return None if len(calls) == 1 else await active_job(db, project_id)
+    
+    monkeypatch.setattr(jobs, "_active_job", stale_check)
+    assert asyncio.run(_enqueue(project)) == (first_id, jobs.JobStatus.QUEUED)
+    assert len(calls) == 2
+
+def test_migration_keeps_one_active_job_per_project(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    migrate(engine, target=5, log=lambda message: None)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email, username, hashed_password) VALUES (1, 'a@example.com', 'alice', 'x')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO projects (id, title, document_type, main_topic, user_id) VALUES (1, 'T', 'DOCX', 'Topic', 1)"
+        )
+        for status in ("QUEUED", "RUNNING", "COMPLETED"):
+            conn.exec_driver_sql(
+                "INSERT INTO generation_jobs (project_id, user_id, status, total_sections, completed_sections) VALUES (1, 1, ?, 0, 0)",
+                (status,)
+            )
+    
+    migrate(engine, log=lambda message: None)
+    
+    with engine.connect() as conn:
+        statuses = [row[0] for row in conn.exec_driver_sql("SELECT status FROM generation_jobs ORDER BY id")]
+        assert statuses == ["QUEUED", "FAILED", "COMPLETED"]
+        index_names = [index["name"] for index in inspect(conn).get_indexes("generation_jobs")]
+    assert "uq_generation_jobs_project_id_active" in index_names
+
+def test_lease_renewal_survives_database_errors(monkeypatch):
+    renewals = []
+    
+    class FlakySession:
+        async def __aenter__(self):
+            renewals.append(len(renewals))
+            if len(renewals) == 1:
+                raise RuntimeError("database is locked")
+            return self
+        
+        async def __aexit__(self, *exc_info):
+            return False
+        
+        async def execute(self, statement):
+            pass
+        
+        async def commit(self):
+            pass
+    
+    monkeypatch.setattr(jobs, "AsyncSessionLocal", FlakySession)
+    worker = jobs.GenerationWorker(lease_seconds=0.03)
+    
+    async def heartbeat():
+        task = asyncio.create_task(worker._renew_lease(1))
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        task.cancel()
+    
+    asyncio.run(heartbeat())
+    assert len(renewals) >= 2
+
+def test_job_is_resumed_once_its_lease_expires(create_project, monkeypatch):
+    project = create_project(section_count=3)
+    job_id, _ = asyncio.run(_enqueue(project))
+    done_id = project["sections"][0]["id"]
+    
+    # The worker that claimed the job finished one section, then died
+    db = SessionLocal()
+    try:
+        # Jobs queued by other tests would be claimed first
+        db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id != job_id, GenerationJob.status.in_(jobs.ACTIVE_STATUSES))
+            .values(status=JobStatus.COMPLETED, locked_until=None)
+        )
+        db.execute(update(Section).where(Section.id == done_id).values(content="Written before the crash"))
+        db.execute(update(GenerationJobItem).where(GenerationJobItem.job_id == job_id).values(status=JobStatus.RUNNING))
+        db.execute(
+            update(GenerationJobItem)
+            .where(GenerationJobItem.job_id == job_id, GenerationJobItem.section_id == done_id)
+            .values(status=JobStatus.COMPLETED)
+        )
+        db.execute(
+            update(GenerationJob).where(GenerationJob.id == job_id)
+            .values(status=JobStatus.RUNNING, completed_sections=1, locked_until=datetime.utcnow() + timedelta(minutes=5))
+        )
+        db.commit()
+    finally:
+        db.close()
+    
+    requested = []
+    
+    async def generate_sections(sections, main_topic, document_type, user_id):
+        for section_id, title in sections:
+            requested.append(section_id)
+            yield section_id, f"Generated {title}"
+    
+    monkeypatch.setattr(jobs.async_llm_service, "generate_sections", generate_sections)
+    worker = jobs.GenerationWorker(lease_seconds=60)
+    
+    async def run_once():
+        try:
+            return await worker.run_once()
+        finally:
+            await async_engine.dispose()
+    
+    # Still leased to the dead worker: nobody else may take it yet
+    assert asyncio.run(run_once()) is False
+    
+    db = SessionLocal()
+    try:
+        db.execute(update(GenerationJob).where(GenerationJob.id == job_id).values(locked_until=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+    finally:
+        db.close()
+    
+    assert asyncio.run(run_once()) is True
+    assert sorted(requested) == sorted(section["id"] for section in project["sections"][1:])
+    
+    db = SessionLocal()
+    try:
+        job = db.get(GenerationJob, job_id)
+        assert (job.status, job.completed_sections, job.locked_until) == (JobStatus.COMPLETED, 3, None)
+        assert {item.status for item in job.items} == {JobStatus.COMPLETED}
+        assert db.get(Section, done_id).content == "Written before the crash"
+    finally:
+        db.close()
@@ -0,0 +1,35 @@
+from app.services.cache import MemoryLRUCache
+from app.services.llm import AsyncLLMService, LLMUnavailableError, llm_scheduler
+import asyncio
+import json
+
+TITLES = ["Market", "Plan", "Risks"]
+
+def _deck(slide_count: int) -> str:
+    bullets = ["First point", "Second point", "Third point"]
+    return json.dumps({"slides": [{"index": index, "bullets": bullets} for index in range(1, slide_count + 1)]})
+
+def _service(monkeypatch, complete) -> AsyncLLMService:
+    service = AsyncLLMService(llm_scheduler, cache=MemoryLRUCache(16))
+    monkeypatch.setattr(service, "_complete", complete)
+    return service
+
+def test_failed_deck_call_falls_back_to_per_slide(monkeypatch):
+    async def complete(*args, **kwargs):
+        raise LLMUnavailableError("rate limited")
+    
+    service = _service(monkeypatch, complete)
+    assert asyncio.run(service.generate_deck(TITLES, "Growth")) == {}
+
+def test_only_complete_decks_are_cached(monkeypatch):
+    responses = [_deck(2), _deck(3)]
+    
+    async def complete(*args, **kwargs):
+        return responses.pop(0)
+    
+    service = _service(monkeypatch, complete)
+    assert sorted(asyncio.run(service.generate_deck(TITLES, "Growth"))) == [0, 1]
+    assert sorted(asyncio.run(service.generate_deck(TITLES, "Growth"))) == [0, 1, 2]
+    # Served from the cache: no third completion
+    assert sorted(asyncio.run(service.generate_deck(TITLES, "Growth"))) == [0, 1, 2]
+    assert responses == []
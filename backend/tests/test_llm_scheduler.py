@@ -0,0 +1,68 @@
+from groq import RateLimitError
+from app.services.llm import LLMScheduler
+import asyncio
+import httpx
+import time
+
+def _scheduler(**overrides) -> LLMScheduler:
+    options = dict(
+        requests_per_minute=6000, tokens_per_minute=600000, max_in_flight=1,
+        max_retries=2, backoff_base=0.01, backoff_max=0.05
+    )
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+def _rate_limit_error(retry_after_ms: int) -> RateLimitError:
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after-ms": str(retry_after_ms)}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+def test_calls_are_granted_round_robin_across_users():
+    scheduler = _scheduler()
+    order = []
+    
+    def request(user_key):
+        async def run():
+            order.append(user_key)
+            await asyncio.sleep(0)
+        return run
+    
+    async def main():
+        # A heavy user queues first; the light user's calls still alternate with it
+        await asyncio.gather(
+            *(scheduler.call("heavy", 10, request("heavy")) for _ in range(4)),
+            *(scheduler.call("light", 10, request("light")) for _ in range(2)),
+        )
+    
+    asyncio.run(main())
+    assert order == ["heavy", "light", "heavy", "light", "heavy", "heavy"]
+    assert scheduler.stats()["granted"] == 6
+
+def test_rate_limit_pauses_every_user_for_retry_after():
+    scheduler = _scheduler(max_in_flight=4)
+    attempts = []
+    
+    async def limited():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise _rate_limit_error(200)
+        return "ok"
+    
+    async def other():
+        return time.monotonic()
+    
+    async def main():
+        started = time.monotonic()
+        first = asyncio.create_task(scheduler.call("a", 10, limited))
+        await asyncio.sleep(0.05)
+        # Queued while the key is paused: another user waits out the retry-after too
+        granted_at = await scheduler.call("b", 10, other)
+        assert await first == "ok"
+        return started, granted_at
+    
+    started, granted_at = asyncio.run(main())
+    assert granted_at - started >= 0.2
+    assert attempts[1] - attempts[0] >= 0.2
+    stats = scheduler.stats()
+    assert stats["rate_limited"] == 1
+    assert stats["retries"] == 1
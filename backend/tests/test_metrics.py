@@ -0,0 +1,15 @@
+from app.config import get_settings
+
+def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "metrics_token", "")
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+
+def test_metrics_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "metrics_token", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "db_pool" in response.json()
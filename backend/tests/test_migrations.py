@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from app.migrations import migrate
+from app.models import Revision
+from app.services.revisions import revision_contents
+import pytest
+
+def _texts(count: int):
+    words = "revenue margin pricing channel retention pipeline roadmap growth".split()
+    text = " ".join(words * 20)
+    versions = [text]
+    for index in range(count):
+        text = text.replace(words[index % len(words)], f"{words[index % len(words)]}-{index}", 1)
+        versions.append(text)
+    return versions
+
+@pytest.mark.parametrize("revision_count", [1, 20])
+def test_compress_revisions_round_trips(tmp_path, revision_count):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    migrate(engine, target=3, log=lambda message: None)
+    versions = _texts(revision_count)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email, username, hashed_password) VALUES (1, 'a@example.com', 'alice', 'x')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO projects (id, title, document_type, main_topic, user_id) VALUES (1, 'T', 'DOCX', 'Topic', 1)"
+        )
+        conn.exec_driver_sql('INSERT INTO sections (id, project_id, title, "order") VALUES (1, 1, \'S\', 0)')
+        for previous, new in zip(versions, versions[1:]):
+            conn.exec_driver_sql(
+                "INSERT INTO revisions (section_id, prompt, previous_content, new_content, created_at) VALUES (1, 'Refine', ?, ?, ?)",
+                (previous, new, datetime.utcnow())
+            )
+    
+    migrate(engine, log=lambda message: None)
+    
+    with Session(engine) as db:
+        revisions = db.execute(select(Revision).order_by(Revision.id)).scalars().all()
+        contents = revision_contents(revisions)
+    assert [(previous, new) for _, previous, new in contents] == list(zip(versions, versions[1:]))
+    assert any(revision.storage == "delta" for revision in revisions) == (revision_count > 1)
@@ -0,0 +1,45 @@
+from datetime import datetime
+from sqlalchemy import update
+from app.database import SessionLocal
+from app.models import Project
+from app.services.projects import encode_cursor
+import pytest
+
+def _pages(client, headers, limit: int):
+    ids, cursor = [], None
+    while True:
+        response = client.get("/api/projects", headers=headers, params={"limit": limit, "cursor": cursor})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5])
+def test_pages_split_tied_updated_at_without_gaps_or_repeats(client, auth_headers, create_project, limit):
+    project_ids = [create_project(section_count=1)["id"] for _ in range(5)]
+    # A page boundary has to fall inside the run of identical timestamps
+    tied = datetime(2024, 1, 1, 12, 0, 0)
+    db = SessionLocal()
+    try:
+        db.execute(update(Project).where(Project.id.in_(project_ids[1:4])).values(updated_at=tied))
+        db.commit()
+    finally:
+        db.close()
+    
+    ids = _pages(client, auth_headers, limit)
+    # The two untouched projects (newest first), then the older tied run by descending id
+    assert ids == [project_ids[4], project_ids[0], project_ids[3], project_ids[2], project_ids[1]]
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "bm90LWpzb24",  # base64 of "not-json"
+    encode_cursor(datetime(2024, 1, 1), 1)[:-3],  # truncated
+    "WyJ5ZXN0ZXJkYXkiLDFd",  # ["yesterday",1]
+    "WyIyMDI0LTAxLTAxVDAwOjAwOjAwIl0",  # one element
+])
+def test_invalid_cursor_is_rejected(client, auth_headers, cursor):
+    response = client.get("/api/projects", headers=auth_headers, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,70 @@
+"""
+Database round trips per request for the hot read paths. The bounds are
+constant in the number of projects and sections; a failure here usually means
+a relationship started lazy loading per row.
+"""
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.database import engine, async_engine
+import pytest
+
+@contextmanager
+def count_queries():
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
+
+@pytest.fixture
+def warm_headers(client, auth_headers):
+    # The first authenticated request loads the user into the principal cache
+    assert client.get("/api/auth/me", headers=auth_headers).status_code == 200
+    return auth_headers
+
+@pytest.mark.parametrize("section_count", [1, 25])
+def test_get_project(client, warm_headers, create_project, section_count):
+    project = create_project(section_count)
+    with count_queries() as statements:
+        response = client.get(f"/api/projects/{project['id']}", headers=warm_headers)
+    assert response.status_code == 200
+    assert len(response.json()["sections"]) == section_count
+    # Project, then its sections with one selectin
+    assert len(statements) == 2, statements
+
+@pytest.mark.parametrize("project_count", [1, 12])
+def test_list_projects(client, warm_headers, create_project, project_count):
+    for _ in range(project_count):
+        create_project(3)
+    with count_queries() as statements:
+        response = client.get("/api/projects", headers=warm_headers)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == project_count
+    assert len(statements) == 1, statements
+    
+    with count_queries() as statements:
+        response = client.get("/api/projects?include_section_counts=true", headers=warm_headers)
+    assert response.status_code == 200
+    assert len(statements) == 2, statements
+
+@pytest.mark.parametrize("document_type", ["docx", "pptx"])
+def test_export(client, warm_headers, create_project, document_type):
+    project = create_project(20, document_type)
+    with count_queries() as statements:
+        response = client.get(f"/api/projects/{project['id']}/export", headers=warm_headers)
+    assert response.status_code == 200
+    assert len(statements) == 2, statements
+    
+    # Served from the export cache: same lookup, no render
+    with count_queries() as statements:
+        response = client.get(f"/api/projects/{project['id']}/export", headers=warm_headers)
+    assert response.status_code == 200
+    assert len(statements) == 2, statements
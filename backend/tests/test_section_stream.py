@@ -0,0 +1,14 @@
+from app.routers.projects import _stream_section_update
+import asyncio
+
+async def _deltas():
+    yield "Some "
+    yield "text"
+
+async def _collect(events):
+    return [event async for event in events]
+
+def test_stream_reports_a_missing_section():
+    events = asyncio.run(_collect(_stream_section_update(987654321, _deltas())))
+    assert events[-1] == 'event: error\ndata: {"detail": "Section not found"}\n\n'
+    assert len(events) == 3
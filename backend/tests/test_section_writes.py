@@ -0,0 +1,108 @@
+from app.database import SessionLocal
+from app.models import Section
+from app.services.section_writes import SectionWriteBuffer, section_write_buffer
+
+def _stored(section_id: int) -> Section:
+    db = SessionLocal()
+    try:
+        return db.get(Section, section_id)
+    finally:
+        db.close()
+
+def _write_through(section_id: int, **values):
+    # What another worker (or the job worker / SSE persist) does: an ORM commit,
+    # which moves updated_at forward
+    db = SessionLocal()
+    try:
+        section = db.get(Section, section_id)
+        for name, value in values.items():
+            setattr(section, name, value)
+        db.commit()
+    finally:
+        db.close()
+
+def test_buffered_content_survives_newer_feedback_write(create_project):
+    project = create_project()
+    section = project["sections"][0]
+    buffer = SectionWriteBuffer(window=60)
+    
+    buffer.put(section["id"], project["id"], "Draft text")
+    _write_through(section["id"], liked=True, comment="Looks good")
+    buffer.flush_all()
+    
+    stored = _stored(section["id"])
+    assert stored.content == "Draft text"
+    assert stored.liked is True
+    assert stored.comment == "Looks good"
+    assert buffer.stats()["superseded_sections"] == 0
+
+def test_buffered_content_does_not_overwrite_newer_content(create_project):
+    project = create_project()
+    section = project["sections"][0]
+    buffer = SectionWriteBuffer(window=60)
+    
+    buffer.put(section["id"], project["id"], "Draft text")
+    _write_through(section["id"], content="Generated text")
+    buffer.flush_all()
+    
+    assert _stored(section["id"]).content == "Generated text"
+    assert buffer.stats()["superseded_sections"] == 1
+
+def test_content_written_before_a_later_edit_is_replaced(create_project):
+    project = create_project()
+    section = project["sections"][0]
+    buffer = SectionWriteBuffer(window=60)
+    
+    _write_through(section["id"], content="Generated text")
+    buffer.put(section["id"], project["id"], "Edited text")
+    buffer.flush_all()
+    
+    assert _stored(section["id"]).content == "Edited text"
+
+def test_update_section_buffers_content_and_writes_feedback_through(client, auth_headers, create_project):
+    section = create_project()["sections"][0]
+    
+    response = client.put(f"/api/projects/sections/{section['id']}", headers=auth_headers, json={"content": "Draft text"})
+    assert response.status_code == 200
+    assert response.json()["content"] == "Draft text"
+    response = client.put(f"/api/projects/sections/{section['id']}", headers=auth_headers, json={"liked": False})
+    assert response.status_code == 200
+    assert response.json()["liked"] is False
+    
+    stored = _stored(section["id"])
+    assert stored.liked is False
+    assert stored.content == ""
+    
+    section_write_buffer.flush_section(section["id"])
+    stored = _stored(section["id"])
+    assert stored.content == "Draft text"
+    assert stored.liked is False
+
+def test_newest_edit_wins_across_workers(create_project):
+    # Back-to-back autosaves of one section handled by two worker processes
+    project = create_project()
+    section = project["sections"][0]
+    first, second = SectionWriteBuffer(window=60), SectionWriteBuffer(window=60)
+    
+    first.put(section["id"], project["id"], "abc")
+    second.put(section["id"], project["id"], "abcd")
+    first.flush_all()
+    second.flush_all()
+    assert _stored(section["id"]).content == "abcd"
+    
+    first.put(section["id"], project["id"], "abcde")
+    second.put(section["id"], project["id"], "abcdef")
+    second.flush_all()
+    first.flush_all()
+    assert _stored(section["id"]).content == "abcdef"
+    assert first.stats()["superseded_sections"] == 1
+
+def test_batch_update_rejects_duplicate_section_ids(client, auth_headers, create_project):
+    project = create_project(section_count=2)
+    section_id = project["sections"][0]["id"]
+    response = client.patch(f"/api/projects/{project['id']}/sections", headers=auth_headers, json={
+        "sections": [{"id": section_id, "comment": "first"}, {"id": section_id, "comment": "second"}],
+    })
+    assert response.status_code == 422
+    assert "Duplicate section ids" in response.text
+    assert client.get(f"/api/projects/{project['id']}", headers=auth_headers).json()["sections"][0]["comment"] == ""
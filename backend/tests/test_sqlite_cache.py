@@ -0,0 +1,33 @@
+from app.services.cache import MemoryLRUCache, SQLiteCache, TieredCache
+import asyncio
+
+def test_running_total_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_bytes=1000)
+    for index in range(5):
+        cache.set(f"key{index}", bytes(300))
+    
+    stats = cache.stats()
+    assert stats["bytes"] <= 1000
+    assert cache.get("key0") is None
+    assert cache.get("key4") == bytes(300)
+
+def test_running_total_starts_from_the_existing_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = SQLiteCache(path, max_bytes=1000)
+    first.set("old", bytes(800))
+    
+    second = SQLiteCache(path, max_bytes=1000)
+    second.set("new", bytes(400))
+    
+    assert second.get("old") is None
+    assert second.get("new") == bytes(400)
+
+def test_tiered_async_promotes_disk_hits(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    disk.set("key", b"value")
+    cache = TieredCache(MemoryLRUCache(16), disk)
+    
+    assert asyncio.run(cache.get_async("key")) == b"value"
+    assert cache.memory.get("key") == b"value"
+    asyncio.run(cache.set_async("other", b"x"))
+    assert disk.get("other") == b"x"
@@ -0,0 +1,19 @@
+"""
+Standalone generation job worker.
+
+Run alongside the API (with JOB_WORKER_ENABLED=false on the web processes) to keep
+long LLM generation off the API workers entirely:
+
+    python worker.py
+
+Run `python migrate_db.py` first; the worker does not create tables.
+"""
+import asyncio
+from app.services.jobs import generation_worker
+
+if __name__ == "__main__":
+    print("Generation worker started, polling for jobs...")
+    try:
+        asyncio.run(generation_worker.run())
+    except KeyboardInterrupt:
+        print("\nGeneration worker stopped")
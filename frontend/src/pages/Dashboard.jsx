@@ -6,7 +6,9 @@ import './Dashboard.css';
 
 function Dashboard() {
   const [projects, setProjects] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
   const navigate = useNavigate();
   const { user, logout } = useAuth();
@@ -18,7 +20,8 @@ function Dashboard() {
   const loadProjects = async () => {
     try {
       const response = await projectAPI.list();
-      setProjects(response.data);
+      setProjects(response.data.items);
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
       setError('Failed to load projects');
       console.error(err);
@@ -27,6 +30,20 @@ function Dashboard() {
     }
   };
 
+  const loadMoreProjects = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await projectAPI.list({ cursor: nextCursor });
+      setProjects([...projects, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError('Failed to load projects');
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDeleteProject = async (projectId, e) => {
     e.stopPropagation();
     if (!window.confirm('Are you sure you want to delete this project?')) {
@@ -109,7 +126,7 @@ function Dashboard() {
                   </button>
                 </div>
                 <h3 className="project-title">{project.title}</h3>
-                <p className="project-topic">{project.main_topic}</p>
+                <p className="project-topic">{project.topic_preview}</p>
                 <div className="project-footer">
                   <span className="project-date">
                     Updated: {formatDate(project.updated_at)}
@@ -119,6 +136,18 @@ function Dashboard() {
             ))}
           </div>
         )}
+
+        {nextCursor && !loading && (
+          <div className="load-more">
+            <button
+              className="create-button"
+              onClick={loadMoreProjects}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
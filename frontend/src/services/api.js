@@ -34,7 +34,7 @@ export const authAPI = {
 
 // Project APIs
 export const projectAPI = {
-  list: () => api.get('/projects'),
+  list: (params) => api.get('/projects', { params }),
   create: (data) => api.post('/projects', data),
   get: (id) => api.get(`/projects/${id}`),
   delete: (id) => api.delete(`/projects/${id}`),
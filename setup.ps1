@@ -51,6 +51,9 @@ if (-not (Test-Path ".env")) {
     Write-Host "[OK] .env file already exists" -ForegroundColor Green
 }
 
+Write-Host "Applying database migrations..." -ForegroundColor Yellow
+python migrate_db.py
+
 cd ..
 
 Write-Host ""